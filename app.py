@@ -1,18 +1,59 @@
 # app.py - Main Application Class
 
+import os
+import time
 import tkinter as tk
+from importlib import import_module
 from config import *
-from ui.controls import UIControls
-from ui.windows import SettingsWindow, DevMode
-from tools.circle_crop import CircleCropTool
-from tools.ring_maker import RingMakerTool
-from tools.drawing import DrawingTool, EraserTool
-from tools.transform import TransformTool
-from steps.welcome import WelcomeStep
+from ui.controls import UIControls, CanvasPhoto, PhotoBuffer
+from ui.jobs import JobRunner
+from ui.scheduler import FrameScheduler
 from utils.presets import load_presets
+from utils.cache import PreviewCache
+from utils.history import EditHistory
+from utils.opgraph import OpGraph
+from utils.layers import LayerStack
+from utils.saving import SaveService
+from utils.perf import timed
 from PIL import Image
 
+# Tools, steps and windows are imported on first use to keep startup short;
+# the welcome screen needs none of them.
+
+# Step handlers by step number
+STEP_HANDLERS = (("steps.welcome", "WelcomeStep"), ("steps.full_health", "FullHealthStep"),
+                 ("steps.medium_health", "MediumHealthStep"), ("steps.low_health", "LowHealthStep"),
+                 ("steps.final_health", "FinalHealthStep"), ("steps.end_screen", "EndScreen"))
+
+# Jobs that write files and must finish before the app exits
+WRITE_JOBS = ("save", "export", "project_save", "bdce_save")
+
+class LazyTool:
+    """Class attribute that imports and builds a tool the first time it is used"""
+    
+    def __init__(self, module, name):
+        self.module = module
+        self.name = name
+    
+    def __set_name__(self, owner, attr):
+        self.attr = attr
+    
+    def __get__(self, app, owner=None):
+        if app is None:
+            return self
+        tool = getattr(import_module(self.module), self.name)(app)
+        # Stored on the instance, which hides this descriptor from now on
+        app.__dict__[self.attr] = tool
+        return tool
+
+
 class WODSkinMaker(UIControls):
+    circle_crop = LazyTool("tools.circle_crop", "CircleCropTool")
+    ring_maker = LazyTool("tools.ring_maker", "RingMakerTool")
+    drawing_tool = LazyTool("tools.drawing", "DrawingTool")
+    eraser_tool = LazyTool("tools.drawing", "EraserTool")
+    transform = LazyTool("tools.transform", "TransformTool")
+    
     def __init__(self, root):
         self.root = root
         self.root.title(APP_TITLE)
@@ -28,24 +69,26 @@ class WODSkinMaker(UIControls):
         # Create UI
         self.create_ui()
         
-        # Initialize tools
-        self.circle_crop = CircleCropTool(self)
-        self.ring_maker = RingMakerTool(self)
-        self.drawing_tool = DrawingTool(self)
-        self.eraser_tool = EraserTool(self)
-        self.transform = TransformTool(self)
+        # Background jobs report progress in the status bar
+        self.jobs = JobRunner(self.root, self.set_status)
+        self.saver = SaveService()
+        self.frames = FrameScheduler(self.root)
         
         # Start with welcome screen
-        self.current_step_handler = WelcomeStep(self)
-        self.current_step_handler.show()
+        self.show_step(0)
     
     def setup_shortcuts(self):
         """Setup keyboard shortcuts"""
         self.root.bind("<Escape>", lambda e: self.confirm_exit())
-        self.root.bind("<Control-d>", lambda e: DevMode.open(self))
+        self.root.bind("<Control-d>", lambda e: self.open_dev_mode())
         self.root.bind("<Control-plus>", lambda e: self.transform.zoom_in())
         self.root.bind("<Control-equal>", lambda e: self.transform.zoom_in())
         self.root.bind("<Control-minus>", lambda e: self.transform.zoom_out())
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Z>", lambda e: self.redo())
+        self.root.bind("<Control-s>", lambda e: self.save_project())
+        self.root.bind("<Control-o>", lambda e: self.open_project())
     
     def init_variables(self):
         """Initialize all app variables"""
@@ -54,19 +97,33 @@ class WODSkinMaker(UIControls):
         
         # Images
         self.full_health_image = None
-        self.preview_image = None
         self.medium_health_image = None
         self.low_health_image = None
         self.broken_reference = None
         self.low_broken_reference = None
         self.broken_effect_image = None
+        self.damage_mask = None
         self.full_health_saved = False
+        self.preview_cache = PreviewCache()
+        
+        # Edits of the full health image, re-renderable at any resolution
+        self.graph = OpGraph()
+        
+        # Damage steps show the full health art through the broken/eraser mask
+        self.layers = LayerStack()
+        
+        # Open .wodskin project (its layers stay memory-mapped)
+        self.project = None
         
         # Settings
         self.settings = DEFAULT_SETTINGS.copy()
         self.presets = load_presets(PRESETS_FILE)
         self.auto_save_count = 0
         
+        # Undo/redo
+        self.history = EditHistory(self.settings["undo_history_limit"],
+                                   self.settings["undo_memory_mb"] * 1024 * 1024)
+        
         # Import config constants
         self.BG = BG
         self.PANEL = PANEL
@@ -89,6 +146,10 @@ class WODSkinMaker(UIControls):
         self.canvas = tk.Canvas(self.left_frame, bg=BG, highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
         
+        # The preview is one canvas item whose photo is updated in place
+        self.preview_photo = CanvasPhoto(self.canvas)
+        self.patch_buffer = PhotoBuffer()
+        
         # Header
         self.header = tk.Label(self.right_frame, text=APP_TITLE, 
                                font=("Consolas", 16, "bold"), fg=ACCENT, bg=PANEL)
@@ -100,6 +161,11 @@ class WODSkinMaker(UIControls):
                                           wraplength=330)
         self.instruction_label.pack(pady=10)
         
+        # Status bar for background jobs
+        self.status_label = tk.Label(self.right_frame, text="", font=("Consolas", 9),
+                                     fg=TEXT, bg=PANEL)
+        self.status_label.pack(side="bottom", pady=5)
+        
         # Control frame
         self.control_frame = tk.Frame(self.right_frame, bg=PANEL)
         self.control_frame.pack(pady=20, fill="both", expand=True)
@@ -110,12 +176,24 @@ class WODSkinMaker(UIControls):
         """Confirm before exiting"""
         from tkinter import messagebox
         if messagebox.askyesno("Exit", "Are you sure you want to exit?"):
+            # shutdown() drops queued jobs; let clicked saves reach the disk first
+            self.set_status("Finishing saves...")
+            self.root.update_idletasks()
+            self.jobs.wait(WRITE_JOBS)
+            self.jobs.shutdown()
+            self.saver.flush(timeout=5)
             self.root.destroy()
     
     def open_settings(self):
         """Open settings window"""
+        from ui.windows import SettingsWindow
         SettingsWindow.open(self)
     
+    def open_dev_mode(self):
+        """Open the dev mode password dialog"""
+        from ui.windows import DevMode
+        DevMode.open(self)
+    
     def upd_setting(self, key, val):
         """Update a setting and apply if needed"""
         self.settings[key] = val
@@ -132,12 +210,172 @@ class WODSkinMaker(UIControls):
         elif key == "canvas_zoom":
             if self.full_health_image:
                 self.update_preview(self.full_health_image)
+        elif key == "undo_history_limit":
+            self.history.max_entries = val
+            self.history.trim()
+        elif key == "undo_memory_mb":
+            self.history.max_bytes = val * 1024 * 1024
+            self.history.trim()
         elif key == "ring_thickness_preset":
             self.ring_maker.ring_thickness = val
         elif key == "preview_size":
             sizes = {"small": 300, "medium": 600, "large": 800}
             self.canvas.config(height=sizes.get(val, 600))
     
+    def working_size(self):
+        """Longest side images are loaded at (the original is kept for export)"""
+        return int(self.settings["working_resolution"])
+    
+    @timed("history.undo")
+    def undo(self):
+        """Undo the last image edit"""
+        attr = self.history.undo(self)
+        if attr:
+            self.show_edited(attr)
+    
+    @timed("history.redo")
+    def redo(self):
+        """Redo the last undone image edit"""
+        attr = self.history.redo(self)
+        if attr:
+            self.show_edited(attr)
+    
+    def show_step(self, number):
+        """Show the handler for a step number (0 welcome .. 5 end screen)"""
+        module, name = STEP_HANDLERS[max(0, min(number, len(STEP_HANDLERS) - 1))]
+        self.current_step_handler = getattr(import_module(module), name)(self)
+        self.current_step_handler.show()
+    
+    def save_project(self):
+        """Save images, crop circle and ring settings as a .wodskin project"""
+        from tkinter import filedialog, messagebox
+        from utils.project import write_project, materialize, IMAGE_ATTRS, PROJECT_EXT
+        path = filedialog.asksaveasfilename(
+            defaultextension=PROJECT_EXT,
+            initialfile="skin" + PROJECT_EXT,
+            filetypes=[("WOD Skin Project", "*" + PROJECT_EXT)])
+        if not path:
+            return
+        
+        # Layers mapped from this file must be in memory before it is replaced
+        if self.project and os.path.abspath(self.project.path) == os.path.abspath(path):
+            for attr in IMAGE_ATTRS:
+                setattr(self, attr, materialize(getattr(self, attr)))
+            # The damage layers show the same images; point them at the copies
+            if self.layers.image("mask") is not None:
+                self.set_damage(self.damage_mask)
+            try:
+                self.project.close()
+            except BufferError:
+                self.show_error("Project save failed: the open project is still in use")
+                return
+            self.project = None
+        
+        # Snapshot the images so edits during the write don't tear a layer
+        images = {a: getattr(self, a).copy() if getattr(self, a) else None
+                  for a in IMAGE_ATTRS}
+        crop = self.circle_crop
+        state = {
+            "step": self.current_step,
+            "full_health_saved": self.full_health_saved,
+            "auto_save_count": self.auto_save_count,
+            "crop": {"center_x": crop.last_center_x, "center_y": crop.last_center_y,
+                     "radius": crop.last_radius},
+            "ring": {"color": list(self.ring_maker.ring_color),
+                     "thickness": self.ring_maker.ring_thickness},
+        }
+        
+        self.jobs.submit("project_save", write_project, path, images, state,
+                         on_done=lambda p: messagebox.showinfo("Saved", f"Project saved: {p}"),
+                         on_error=lambda e: self.show_error(f"Project save failed: {e}"),
+                         label="Saving project")
+    
+    def open_project(self):
+        """Reopen a .wodskin project and return to the step it was saved on"""
+        from tkinter import filedialog
+        from utils.project import Project, IMAGE_ATTRS, PROJECT_EXT
+        path = filedialog.askopenfilename(
+            filetypes=[("WOD Skin Project", "*" + PROJECT_EXT), ("All Files", "*.*")])
+        if not path:
+            return
+        
+        start = time.perf_counter()
+        try:
+            project = Project(path)
+        except (OSError, ValueError, KeyError) as e:
+            self.show_error(f"Could not open project:\n{e}")
+            return
+        
+        old, self.project = self.project, project
+        for attr in IMAGE_ATTRS:
+            setattr(self, attr, project.image(attr))
+        
+        state = project.state
+        crop = state.get("crop", {})
+        self.circle_crop.last_center_x = crop.get("center_x")
+        self.circle_crop.last_center_y = crop.get("center_y")
+        self.circle_crop.last_radius = crop.get("radius")
+        ring = state.get("ring", {})
+        self.ring_maker.ring_color = tuple(ring.get("color", self.ring_maker.ring_color))
+        self.ring_maker.ring_thickness = ring.get("thickness", self.ring_maker.ring_thickness)
+        self.full_health_saved = state.get("full_health_saved", False)
+        self.auto_save_count = state.get("auto_save_count", 0)
+        self.history.clear()
+        self.graph.reset(self.full_health_image)
+        self.layers.clear()
+        if old:
+            try:
+                old.close()
+            except BufferError:
+                # A tool still holds an old image; the mapping goes with it
+                pass
+        if (self.damage_mask is not None and self.full_health_image
+                and self.damage_mask.size == self.full_health_image.size):
+            self.set_damage(self.damage_mask)
+        
+        self.show_step(state.get("step", 1))
+        if self.full_health_image:
+            self.update_preview(self.full_health_image)
+        self.set_status(f"Opened {os.path.basename(path)} in "
+                        f"{(time.perf_counter() - start) * 1000:.0f} ms")
+    
+    def show_edited(self, attr):
+        """Preview the image an undo or redo changed"""
+        if attr == "damage_mask":
+            # The mask was restored in place; recombine the mask layer, shown
+            # again so the damaged image never becomes the bare art
+            self.layers.set("mask", self.damage_mask)
+            self.layers.set_visible("mask", True)
+            self.layers.mark_dirty("mask")
+            self.broken_effect_image = self.layers.composite()
+            attr = "broken_effect_image"
+        self.update_preview(getattr(self, attr))
+    
+    def set_damage(self, mask):
+        """Show the full health image through a damage mask (L, edited by the eraser)"""
+        self.damage_mask = mask
+        self.layers.set("art", self.full_health_image)
+        self.layers.set("mask", mask)
+        self.layers.set_visible("mask", True)
+        self.broken_effect_image = self.layers.composite()
+    
+    def toggle_damage(self):
+        """Show or hide the damage mask layer; only the top layer is recombined"""
+        if self.damage_mask is None:
+            self.show_error("Load a broken reference first!")
+            return
+        self.layers.set_visible("mask", not self.layers.visible("mask"))
+        self.update_preview(self.layers.composite())
+    
+    def apply_edit(self, result, nodes, before=None, boxes=None):
+        """Make result the full health image, recording both op graph states in history"""
+        if before is None:
+            before = self.full_health_image
+        ops = (self.graph.snapshot(), tuple(nodes))
+        self.history.record("full_health_image", before, result, boxes, ops)
+        self.graph.set_nodes(nodes, result)
+        self.full_health_image = result
+    
     def apply_font_size(self, sz):
         """Apply font size to all UI elements"""
         self.header.config(font=("Consolas", sz + 5, "bold"))
@@ -164,6 +402,7 @@ class WODSkinMaker(UIControls):
         self.canvas.configure(bg=t["bg"])
         self.header.configure(bg=t["panel"], fg=t["accent"])
         self.instruction_label.configure(bg=t["panel"], fg=t["text"])
+        self.status_label.configure(bg=t["panel"], fg=t["text"])
         self.control_frame.configure(bg=t["panel"])
         
         for btn in self.buttons.values():
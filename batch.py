@@ -0,0 +1,37 @@
+# batch.py - WOD Skin Maker headless batch builder
+#
+# Usage: python batch.py manifest.json [--workers N]
+
+import argparse
+import sys
+import time
+from utils.batch import load_manifest, build_all
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build WOD skins from a manifest without the GUI")
+    parser.add_argument("manifest", help="Path to the JSON manifest")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    jobs = load_manifest(args.manifest)
+    if not jobs:
+        print("No skins found in manifest")
+        return 1
+
+    start = time.perf_counter()
+    failed = 0
+    for job, paths, error in build_all(jobs, args.workers):
+        label = f"{job['unit']}/{job['name']}"
+        if error:
+            failed += 1
+            print(f"  ✗ {label}: {error}")
+        else:
+            print(f"  ✓ {label}: {len(paths)} files")
+
+    elapsed = time.perf_counter() - start
+    print(f"\nBuilt {len(jobs) - failed}/{len(jobs)} skin units in {elapsed:.2f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
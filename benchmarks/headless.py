@@ -0,0 +1,127 @@
+# benchmarks/headless.py - A WODSkinMaker without a display, for timing render paths
+
+import itertools
+import types
+
+_ids = itertools.count(1)
+
+
+class FakePhoto:
+    """Stands in for ImageTk.PhotoImage; keeps the image, costs nothing"""
+
+    def __init__(self, image=None, **kwargs):
+        self.image = image
+        self.name = f"photo{next(_ids)}"
+
+    def __str__(self):
+        return self.name
+
+    def paste(self, image, box=None):
+        self.image = image
+
+    def width(self):
+        return self.image.width if self.image else 0
+
+    def height(self):
+        return self.image.height if self.image else 0
+
+
+class FakeTk:
+    def call(self, *args):
+        return ""
+
+
+class FakeCanvas:
+    """Canvas that accepts every call the tools make and draws nothing"""
+
+    def __init__(self, width=800, height=800):
+        self.width = width
+        self.height = height
+        self.tk = FakeTk()
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def _item(self, *args, **kwargs):
+        return next(_ids)
+
+    create_image = create_oval = create_rectangle = create_line = _item
+
+    def _noop(self, *args, **kwargs):
+        return None
+
+    delete = coords = itemconfig = tag_raise = tag_lower = bind = unbind = config = _noop
+
+
+class FakeRoot:
+    """Collects after() callbacks instead of running an event loop"""
+
+    def __init__(self):
+        self.pending = {}
+
+    def after(self, ms, fn=None, *args):
+        job = f"after#{next(_ids)}"
+        self.pending[job] = (fn, args)
+        return job
+
+    def after_idle(self, fn, *args):
+        return self.after(0, fn, *args)
+
+    def after_cancel(self, job):
+        self.pending.pop(job, None)
+
+    def run_pending(self):
+        """Run every queued callback once (callbacks may queue more)"""
+        jobs, self.pending = self.pending, {}
+        for fn, args in jobs.values():
+            if fn:
+                fn(*args)
+
+
+class FakeEvent:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class FakeLabel:
+    def config(self, **kwargs):
+        pass
+
+
+def make_app(canvas_size=(800, 800)):
+    """Build the app object with fake Tk parts; tools and caches are real"""
+    import ui.controls
+    ui.controls.ImageTk = types.SimpleNamespace(PhotoImage=FakePhoto)
+
+    from app import WODSkinMaker
+    from ui.controls import CanvasPhoto, PhotoBuffer
+    from ui.jobs import JobRunner
+    from ui.scheduler import FrameScheduler
+    from tools.circle_crop import CircleCropTool
+    from tools.ring_maker import RingMakerTool
+    from tools.drawing import DrawingTool, EraserTool
+    from tools.transform import TransformTool
+    from utils.saving import SaveService
+
+    app = WODSkinMaker.__new__(WODSkinMaker)
+    app.root = FakeRoot()
+    app.canvas = FakeCanvas(*canvas_size)
+    app.preview_photo = CanvasPhoto(app.canvas)
+    app.patch_buffer = PhotoBuffer()
+    app.init_variables()
+    app.status_label = FakeLabel()
+    app.instruction_label = FakeLabel()
+    app.jobs = JobRunner(app.root)
+    app.saver = SaveService()
+    app.frames = FrameScheduler(app.root)
+    app.buttons = {}
+    app.circle_crop = CircleCropTool(app)
+    app.ring_maker = RingMakerTool(app)
+    app.drawing_tool = DrawingTool(app)
+    app.eraser_tool = EraserTool(app)
+    app.transform = TransformTool(app)
+    return app
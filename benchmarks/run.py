@@ -0,0 +1,405 @@
+# benchmarks/run.py - Hot-path benchmarks for image_ops and the tool render paths
+
+"""Exits 1 on a regression past the threshold or an image_ops function without a case"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import PIL
+from PIL import Image, ImageDraw
+
+from benchmarks.headless import make_app, FakeEvent
+from utils import image_ops
+from utils.image_ops import (load_image, load_original, broken_mask,
+                             apply_broken_effect, render_damage_set, create_circle_mask,
+                             apply_circle_crop, make_circular, ring_layer, add_ring,
+                             flip_image, rotate_image, resize_to_64)
+from ui.windows import BDCEEditor
+from utils.stroke import spray
+
+SIZES = (256, 1024, 4096)
+BASELINE = os.path.join(HERE, "baseline.json")
+
+# Slower than baseline by this factor fails...
+THRESHOLD = 2.0
+# ...unless the difference is below timer noise
+MIN_DELTA_MS = 1.0
+
+# Each repetition is timed separately; the fastest is reported, since
+# slower runs mostly measure other load on the machine
+MIN_REPS = 5
+MAX_REPS = 30
+MIN_TIME = 0.3
+
+CASES = []
+
+def case(group, name):
+    """Register a benchmark: fn(size) returns run or (reset, run)"""
+    def register(fn):
+        CASES.append((group, name, fn))
+        return fn
+    return register
+
+
+# Inputs
+
+def sample_orb(size):
+    """Deterministic RGBA art: a shaded disc on a transparent background"""
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, size // 2, max(1, size // 64)):
+        shade = 60 + 150 * i // (size // 2)
+        draw.ellipse((i, i, size - 1 - i, size - 1 - i), fill=(shade, 40, 255 - shade, 255))
+    return img
+
+def sample_reference(size, seed=1):
+    """Deterministic broken reference: opaque with transparent holes"""
+    rng = random.Random(seed)
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 255))
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randrange(size), rng.randrange(size)
+        r = rng.randint(size // 40 + 1, size // 10 + 1)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=(0, 0, 0, 0))
+    return img
+
+_tmp = tempfile.mkdtemp(prefix="wodskin-bench-")
+
+def sample_file(size):
+    path = os.path.join(_tmp, f"orb_{size}.png")
+    if not os.path.exists(path):
+        sample_orb(size).save(path, compress_level=1)
+    return path
+
+def cold_masks():
+    """Drop the mask caches so a run builds everything it needs"""
+    image_ops._broken_masks.clear()
+    image_ops.ring_alpha.cache_clear()
+    create_circle_mask.cache_clear()
+    ring_layer.cache_clear()
+
+
+# utils.image_ops
+
+@case("image_ops", "load_image")
+def _(size):
+    path = sample_file(size)
+    return lambda: load_image(path, 1024)
+
+@case("image_ops", "load_original")
+def _(size):
+    img = load_image(sample_file(size), 1024)
+    return image_ops._originals.clear, lambda: load_original(img)
+
+@case("image_ops", "snapshot")
+def _(size):
+    img = load_image(sample_file(size))
+    return lambda: image_ops.snapshot(img)
+
+@case("image_ops", "broken_mask")
+def _(size):
+    ref = sample_reference(512)
+    return cold_masks, lambda: broken_mask(ref, (size, size))
+
+@case("image_ops", "apply_broken_effect")
+def _(size):
+    orb, ref = sample_orb(size), sample_reference(512)
+    return cold_masks, lambda: apply_broken_effect(orb, ref)
+
+@case("image_ops", "render_damage_set")
+def _(size):
+    orb = sample_orb(size)
+    refs = {"medium": sample_reference(512, 1), "low": sample_reference(512, 2)}
+    return cold_masks, lambda: render_damage_set(orb, refs)
+
+@case("image_ops", "create_circle_mask")
+def _(size):
+    c = size / 2
+    return cold_masks, lambda: create_circle_mask(size, size, c, c, c - 4)
+
+@case("image_ops", "apply_circle_crop")
+def _(size):
+    orb, c = sample_orb(size), size / 2
+    return cold_masks, lambda: apply_circle_crop(orb, c, c, c - 4)
+
+@case("image_ops", "make_circular")
+def _(size):
+    orb, c = sample_orb(size), size / 2
+    return lambda: make_circular(orb, c, c, c - 4)
+
+@case("image_ops", "ring_alpha")
+def _(size):
+    return cold_masks, lambda: image_ops.ring_alpha(size, max(1, size // 20))
+
+@case("image_ops", "ring_layer")
+def _(size):
+    return cold_masks, lambda: ring_layer(size, (0, 0, 0), max(1, size // 20))
+
+@case("image_ops", "add_ring")
+def _(size):
+    orb = sample_orb(size)
+    return lambda: add_ring(orb, (0, 0, 0), max(1, size // 20))
+
+@case("image_ops", "flip_image")
+def _(size):
+    orb = sample_orb(size)
+    return lambda: flip_image(orb, "horizontal")
+
+@case("image_ops", "rotate_image")
+def _(size):
+    orb = sample_orb(size)
+    return lambda: rotate_image(orb, 90)
+
+@case("image_ops", "resize_to_64")
+def _(size):
+    orb = sample_orb(size)
+    return lambda: resize_to_64(orb)
+
+
+# Tool render paths (headless app, 800x800 canvas)
+
+def stroke_events(n=20):
+    """Canvas positions of one diagonal drag across the preview"""
+    return [FakeEvent(200 + i * 20, 200 + i * 15) for i in range(n + 1)]
+
+@case("tools", "ring_preview")
+def _(size):
+    app = make_app()
+    rm = app.ring_maker
+    c = size / 2
+    rm.source, rm.circle = sample_orb(size), (c, c, c - 4)
+    rm.ring_thickness = max(1, size // 20)
+    # More colors than ring_layer caches, so every tick draws a new ring
+    colors = itertools.cycle([(i * 4, 0, 0) for i in range(64)])
+
+    def run():
+        # One slider tick: the circular base is cached, the ring is not
+        rm.ring_color = next(colors)
+        rm.render((800, 800))
+    return run
+
+@case("tools", "ring_apply")
+def _(size):
+    app = make_app()
+    rm = app.ring_maker
+    c = size / 2
+    rm.source, rm.circle = sample_orb(size), (c, c, c - 4)
+    rm.ring_thickness = max(1, size // 20)
+    return lambda: rm.render()
+
+@case("tools", "crop_show")
+def _(size):
+    app = make_app()
+    cc = app.circle_crop
+    cc.base, cc.cropping_mode = sample_orb(size), True
+    cc.center_x = cc.center_y = size // 2
+    cc.radius = size // 3
+    return app.preview_cache.clear, cc.show_preview
+
+@case("tools", "crop_move")
+def _(size):
+    app = make_app()
+    cc = app.circle_crop
+    cc.base, cc.cropping_mode = sample_orb(size), True
+    cc.center_x = cc.center_y = size // 2
+    cc.radius = size // 3
+    cc.show_preview()
+    events = itertools.cycle(stroke_events())
+
+    def run():
+        cc.on_mouse_move(next(events))
+        app.root.run_pending()
+    return run
+
+@case("tools", "draw_stroke")
+def _(size):
+    app = make_app()
+    dt = app.drawing_tool
+    dt.drawing_enabled = True
+    dt.brush_size = max(2, size // 100)
+    orb = sample_orb(size)
+    events = stroke_events()
+
+    def reset():
+        app.full_health_image = orb.copy()
+        app.graph.reset(app.full_health_image)
+        app.history.clear()
+        app.update_preview(app.full_health_image)
+
+    def run():
+        dt.on_press(events[0])
+        for e in events[1:]:
+            dt.draw_on_canvas(e)
+        dt.on_release(events[-1])
+        app.root.run_pending()
+    return reset, run
+
+@case("tools", "erase_stroke")
+def _(size):
+    app = make_app()
+    er = app.eraser_tool
+    er.eraser_enabled = True
+    er.eraser_size = max(5, size // 50)
+    orb, ref = sample_orb(size), sample_reference(512)
+    events = stroke_events()
+
+    def reset():
+        app.full_health_image = orb
+        app.history.clear()
+        app.set_damage(broken_mask(ref, orb.size).copy())
+        app.update_preview(app.broken_effect_image)
+
+    def run():
+        er.on_press(events[0])
+        for e in events[1:]:
+            er.on_drag(e)
+        er.on_release(events[-1])
+        app.root.run_pending()
+    return reset, run
+
+@case("tools", "bdce_composite")
+def _(size):
+    bg = sample_orb(size)
+    mask = broken_mask(sample_reference(512), (size, size)).copy()
+    return lambda: BDCEEditor.composite(bg, mask, (0, 0, size, size))
+
+@case("tools", "bdce_region")
+def _(size):
+    bg = sample_orb(size)
+    mask = broken_mask(sample_reference(512), (size, size)).copy()
+    c = size // 2
+    return lambda: BDCEEditor.composite(bg, mask, (c - 20, c - 20, c + 21, c + 21))
+
+@case("tools", "bdce_spray")
+def _(size):
+    # One dab on the 512x512 BDCE mask; the brush radius grows with size
+    mask = broken_mask(sample_reference(512), (512, 512)).copy()
+    rng = random.Random(1)
+    radius = max(3, size // 40)
+    return lambda: spray(mask, 256, 256, radius, rng)
+
+@case("tools", "zoom")
+def _(size):
+    app = make_app()
+    app.full_health_image = sample_orb(size)
+    app.transform.zoom_level = 1.4
+    return app.transform.apply_zoom
+
+
+# UIControls preview sizing
+
+@case("preview", "update_preview")
+def _(size):
+    app = make_app()
+    orb = sample_orb(size)
+    return app.preview_cache.clear, lambda: app.update_preview(orb)
+
+@case("preview", "update_preview_cached")
+def _(size):
+    app = make_app()
+    orb = sample_orb(size)
+    app.update_preview(orb)
+    return lambda: app.update_preview(orb)
+
+@case("preview", "canvas_to_image")
+def _(size):
+    app = make_app()
+    orb = sample_orb(size)
+    app.update_preview(orb)
+    return lambda: app.canvas_to_image(400, 400, orb)
+
+
+# Runner
+
+def measure(reset, run):
+    """Fastest milliseconds of run(), with reset() before every repetition"""
+    if reset:
+        reset()
+    run()  # warm up lazy imports and LUTs
+
+    times = []
+    while len(times) < MIN_REPS or (sum(times) < MIN_TIME and len(times) < MAX_REPS):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def uncovered():
+    """Public functions of utils.image_ops without a benchmark"""
+    covered = {name for group, name, fn in CASES if group == "image_ops"}
+    public = {name for name, obj in vars(image_ops).items()
+              if callable(obj) and not name.startswith("_") and not isinstance(obj, type)
+              and getattr(obj, "__module__", None) == image_ops.__name__}
+    return sorted(public - covered)
+
+def environment():
+    return {"python": platform.python_version(), "pillow": PIL.__version__,
+            "platform": platform.platform()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the image hot paths.")
+    parser.add_argument("--update", action="store_true", help="write a new baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"fail when slower than baseline * this (default {THRESHOLD})")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("-k", dest="keyword", help="only run benchmarks whose name contains this")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f).get("results", {})
+
+    results = {}
+    failed = []
+    print(f"{'benchmark':<40}{'ms':>10}{'baseline':>10}{'ratio':>8}")
+    for group, name, factory in CASES:
+        for size in args.sizes:
+            key = f"{group}.{name}@{size}"
+            if args.keyword and args.keyword not in key:
+                continue
+            made = factory(size)
+            reset, run = made if isinstance(made, tuple) else (None, made)
+            ms = results[key] = round(measure(reset, run), 3)
+
+            base = baseline.get(key)
+            if base is None:
+                print(f"{key:<40}{ms:>10.2f}{'-':>10}{'new':>8}")
+                continue
+            ratio = ms / base if base else float("inf")
+            slow = ratio > args.threshold and ms - base > MIN_DELTA_MS
+            if slow:
+                failed.append(key)
+            print(f"{key:<40}{ms:>10.2f}{base:>10.2f}{ratio:>7.2f}x" + ("  SLOWER" if slow else ""))
+
+    missing = uncovered()
+    if missing:
+        print(f"\nNo benchmark for utils.image_ops: {', '.join(missing)}")
+
+    if args.update:
+        merged = dict(baseline, **results)
+        with open(args.baseline, 'w') as f:
+            json.dump({"environment": environment(), "results": merged}, f, indent=2,
+                      sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return 1 if missing else 0
+
+    if failed:
+        print(f"\n{len(failed)} regression(s) past {args.threshold}x: {', '.join(failed)}")
+    return 1 if failed or missing else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
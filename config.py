@@ -25,6 +25,9 @@ DEFAULT_SETTINGS = {
     "confirm_before_save": True,
     "ring_thickness_preset": 20,
     "image_quality": "high",
+    "working_resolution": 1024,
+    "png_compress_level": 6,
+    "png_quantize": False,
     "show_grid": False,
     "auto_name_files": False,
     "show_coordinates": False,
@@ -32,7 +35,8 @@ DEFAULT_SETTINGS = {
     "preview_size": "large",
     "canvas_bg_color": BG,
     "animation_enabled": True,
-    "undo_history_limit": 10,
+    "undo_history_limit": 200,
+    "undo_memory_mb": 64,
     "auto_backup": True,
     "advanced_mode": False
 }
@@ -1,12 +1,30 @@
-# download the whole file and run this and it will work 
+# download the whole file and run this and it will work
 # main.py - WOD Skin Maker Entry Point
 
-
+import sys
+import time
+_start = time.perf_counter()
 
 import tkinter as tk
 from app import WODSkinMaker
+from utils.perf import monitor
+
+def report_startup(root, imported, modules):
+    """Record import and first-paint times once the welcome screen is drawn"""
+    root.update_idletasks()
+    painted = time.perf_counter()
+    monitor.record("startup.import", imported - _start)
+    monitor.record("startup.first_paint", painted - _start)
+
+    # python main.py --startup-report prints them as well
+    if "--startup-report" in sys.argv:
+        print(f"Startup: imports {(imported - _start) * 1000:.0f} ms "
+              f"({modules} modules), first paint {(painted - _start) * 1000:.0f} ms")
 
 if __name__ == "__main__":
+    imported = time.perf_counter()
+    modules = len(sys.modules)
     root = tk.Tk()
     app = WODSkinMaker(root)
+    root.after_idle(report_startup, root, imported, modules)
     root.mainloop()
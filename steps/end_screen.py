@@ -26,13 +26,17 @@ class EndScreen:
         # Reset everything
         self.app.current_step = 0
         self.app.full_health_image = None
-        self.app.preview_image = None
+        self.app.clear_preview()
         self.app.medium_health_image = None
         self.app.low_health_image = None
         self.app.broken_reference = None
         self.app.low_broken_reference = None
         self.app.broken_effect_image = None
+        self.app.damage_mask = None
+        self.app.layers.clear()
         self.app.full_health_saved = False
+        self.app.history.clear()
+        self.app.graph.reset(None)
         self.app.canvas.delete("all")
         
         from steps.welcome import WelcomeStep
@@ -1,8 +1,9 @@
 # steps/final_health.py - Final Health Step (Step 2.2)
 
-from tkinter import filedialog, messagebox
-from PIL import Image
-from utils.image_ops import resize_to_64
+import os
+from tkinter import filedialog, messagebox, simpledialog
+from utils.image_ops import resize_to_64, load_image
+from utils.export import export_sizes, format_report
 
 class FinalHealthStep:
     def __init__(self, app):
@@ -20,14 +21,22 @@ class FinalHealthStep:
         self.app.clear_controls()
         self.app.add_button("Upload Full Health", self.upload_final)
         self.app.add_button("SAVE & Finish", self.save_final)
+        self.app.add_button("Export All Sizes", self.export_all)
         self.app.add_button("Skip to End", self.next_step)
     
     def upload_final(self):
         """Upload final full health image"""
         p = filedialog.askopenfilename(filetypes=[("PNG","*.png")])
         if p:
-            self.app.full_health_image = Image.open(p).convert("RGBA")
-            self.app.update_preview(self.app.full_health_image)
+            self.app.jobs.submit("load_full", load_image, p, self.app.working_size(),
+                                 on_done=self.on_loaded, label="Loading image")
+    
+    def on_loaded(self, img):
+        """Show the loaded image"""
+        self.app.full_health_image = img
+        self.app.history.clear()
+        self.app.graph.reset(img)
+        self.app.update_preview(img)
     
     def save_final(self):
         """Save final full health image"""
@@ -43,15 +52,48 @@ class FinalHealthStep:
         p = filedialog.asksaveasfilename(defaultextension=".png", initialfile=default,
                                          filetypes=[("PNG","*.png")])
         if p:
-            result_64 = resize_to_64(self.app.full_health_image)
-            result_64.save(p)
-            
-            if self.app.settings["auto_backup"]:
-                bp = p + ".backup"
-                result_64.save(bp)
+            def saved(_):
+                messagebox.showinfo("Saved", f"Full health orb saved at 64x64: {p}")
+                self.next_step()
             
-            messagebox.showinfo("Saved", f"Full health orb saved at 64x64: {p}")
-            self.next_step()
+            # Downscaled from the full resolution render of the edits
+            render = self.app.graph.exporter()
+            self.app.save_png(p, lambda: resize_to_64(render()), saved)
+    
+    def export_all(self):
+        """Export 64x64, 200x200 and 256x256 versions into a folder"""
+        if not self.app.full_health_image:
+            self.app.show_error("Upload full health image first!")
+            return
+        
+        folder = filedialog.askdirectory(title="Select export folder")
+        if not folder:
+            return
+        
+        name = simpledialog.askstring("Export", "Skin file name (without size):",
+                                      initialvalue="final_full_health")
+        if not name:
+            return
+        
+        render = self.app.graph.exporter()
+        lvl = self.app.settings["png_compress_level"]
+        quant = self.app.settings["png_quantize"]
+        backup = self.app.settings["auto_backup"]
+        
+        def work(job):
+            results = export_sizes(render(), compress_level=lvl, quantize=quant,
+                                   progress=job.progress)
+            for r in results:
+                path = os.path.join(folder, f"{name}_{r['size']}.png")
+                self.app.saver.save(path, r["data"], backup)
+            return results
+        
+        def exported(results):
+            messagebox.showinfo("Exported", f"Saved to {folder}:\n\n{format_report(results)}")
+        
+        self.app.jobs.submit("export", work, on_done=exported,
+                             on_error=lambda e: self.app.show_error(f"Export failed: {e}"),
+                             label="Exporting", with_job=True)
     
     def next_step(self):
         """Go to end screen"""
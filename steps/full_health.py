@@ -2,7 +2,7 @@
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image
+from utils.image_ops import load_image
 
 class FullHealthStep:
     def __init__(self, app):
@@ -47,9 +47,16 @@ class FullHealthStep:
             filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.bmp;*.webp")]
         )
         if path:
-            self.app.full_health_image = Image.open(path).convert("RGBA")
-            self.app.full_health_saved = False
-            self.app.update_preview(self.app.full_health_image)
+            self.app.jobs.submit("load_full", load_image, path, self.app.working_size(),
+                                 on_done=self.on_loaded, label="Loading image")
+    
+    def on_loaded(self, img):
+        """Show the loaded image"""
+        self.app.full_health_image = img
+        self.app.history.clear()
+        self.app.graph.reset(img)
+        self.app.full_health_saved = False
+        self.app.update_preview(img)
     
     def save_image(self):
         """Save full health image"""
@@ -73,15 +80,13 @@ class FullHealthStep:
         )
         
         if path:
-            self.app.full_health_image.save(path)
-            self.app.full_health_saved = True
-            
-            if self.app.settings["auto_backup"]:
-                backup = path + ".backup"
-                self.app.full_health_image.save(backup)
+            def saved(_):
+                self.app.full_health_saved = True
+                messagebox.showinfo("Success", f"Image saved: {path}")
+                self.show()
             
-            messagebox.showinfo("Success", f"Image saved: {path}")
-            self.show()
+            # Rendered from the original at full resolution
+            self.app.save_png(path, self.app.graph.exporter(), saved)
     
     def next_step(self):
         """Go to medium health step"""
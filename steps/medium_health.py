@@ -1,8 +1,7 @@
 # steps/medium_health.py - Medium Health Step (Step 2)
 
 from tkinter import filedialog, messagebox
-from PIL import Image
-from utils.image_ops import apply_broken_effect, resize_to_64
+from utils.image_ops import apply_broken_effect, broken_mask, resize_to_64, load_image
 
 class MediumHealthStep:
     def __init__(self, app):
@@ -21,6 +20,7 @@ class MediumHealthStep:
         self.app.clear_controls()
         self.app.add_button("Upload Full Health", self.upload_full_health)
         self.app.add_button("Upload Broken Reference", self.upload_broken_reference)
+        self.app.add_button("Toggle Damage", self.app.toggle_damage)
         self.app.add_button("Eraser Tool", lambda: self.app.eraser_tool.start(2))
         self.app.add_button("SAVE & Continue", self.save_medium)
         self.app.add_button("Skip to Next", self.next_step)
@@ -29,20 +29,39 @@ class MediumHealthStep:
         """Upload full health for broken effect"""
         p = filedialog.askopenfilename(filetypes=[("PNG","*.png")])
         if p:
-            self.app.full_health_image = Image.open(p).convert("RGBA")
-            self.app.update_preview(self.app.full_health_image)
+            self.app.jobs.submit("load_full", load_image, p, self.app.working_size(),
+                                 on_done=self.on_full_health_loaded, label="Loading image")
+    
+    def on_full_health_loaded(self, img):
+        """Show the loaded full health image"""
+        self.app.full_health_image = img
+        self.app.history.clear()
+        self.app.graph.reset(img)
+        self.app.update_preview(img)
     
     def upload_broken_reference(self):
         """Upload broken dot reference"""
         p = filedialog.askopenfilename(filetypes=[("PNG","*.png")])
         if p:
-            self.app.broken_reference = Image.open(p).convert("RGBA")
+            full = self.app.full_health_image
+            size = self.app.working_size()
+            
+            def work():
+                ref = load_image(p, size)
+                # A private copy: the eraser edits the mask in place
+                return ref, broken_mask(ref, full.size).copy() if full else None
             
-            if self.app.full_health_image:
-                prev = apply_broken_effect(self.app.full_health_image, self.app.broken_reference)
-                self.app.broken_effect_image = prev.copy()
-                self.app.update_preview(prev)
-                messagebox.showinfo("Reference loaded", "Broken dot reference loaded. Preview updated!")
+            self.app.jobs.submit("broken_ref", work, on_done=self.on_reference_loaded,
+                                 label="Applying broken effect")
+    
+    def on_reference_loaded(self, result):
+        """Store the reference and show the broken effect preview"""
+        self.app.broken_reference, mask = result
+        if mask is not None:
+            self.app.history.clear()
+            self.app.set_damage(mask)
+            self.app.update_preview(self.app.broken_effect_image)
+            messagebox.showinfo("Reference loaded", "Broken dot reference loaded. Preview updated!")
     
     def save_medium(self):
         """Save medium health image"""
@@ -65,16 +84,16 @@ class MediumHealthStep:
         p = filedialog.asksaveasfilename(defaultextension=".png", initialfile=default,
                                          filetypes=[("PNG","*.png")])
         if p:
-            result_64 = resize_to_64(result)
-            result_64.save(p)
-            self.app.medium_health_image = result
+            # Copied here: the eraser edits the composite in place
+            img = result.copy()
             
-            if self.app.settings["auto_backup"]:
-                bp = p + ".backup"
-                result_64.save(bp)
+            def saved(_):
+                # The copy that was written; the composite is reused by later eraser strokes
+                self.app.medium_health_image = img
+                messagebox.showinfo("Saved", f"Medium health orb saved at 64x64: {p}")
+                self.next_step()
             
-            messagebox.showinfo("Saved", f"Medium health orb saved at 64x64: {p}")
-            self.next_step()
+            self.app.save_png(p, lambda: resize_to_64(img), saved)
     
     def next_step(self):
         """Go to low health step"""
@@ -18,10 +18,12 @@ class WelcomeStep:
             "- Tank medium health: tank2_NAMEOFSKIN\n"
             "- Tank low health: tank3_NAMEOFSKIN\n\n"
             "Run this program twice: once for Infantry, once for Tank.\n\n"
+            "Ctrl+S saves your session as a project, Ctrl+O reopens one.\n\n"
             "Click 'Next' to start creating your full health orb."
         )
         self.app.clear_controls()
         self.app.add_button("Next", self.next_step)
+        self.app.add_button("Open Project", self.app.open_project)
         self.app.add_button("Settings", self.app.open_settings)
     
     def next_step(self):
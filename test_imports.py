@@ -13,6 +13,42 @@ try:
     print("  ✓ utils.presets")
     from utils import presets
     
+    print("  ✓ utils.cache")
+    from utils import cache
+    
+    print("  ✓ utils.masks")
+    from utils import masks
+    
+    print("  ✓ utils.stroke")
+    from utils import stroke
+    
+    print("  ✓ utils.export")
+    from utils import export
+    
+    print("  ✓ utils.history")
+    from utils import history
+    
+    print("  ✓ utils.batch")
+    from utils import batch
+    
+    print("  ✓ utils.saving")
+    from utils import saving
+    
+    print("  ✓ utils.project")
+    from utils import project
+    
+    print("  ✓ utils.opgraph")
+    from utils import opgraph
+    
+    print("  ✓ utils.layers")
+    from utils import layers
+    
+    print("  ✓ utils.mipmap")
+    from utils import mipmap
+    
+    print("  ✓ utils.perf")
+    from utils import perf
+    
     print("  ✓ tools.circle_crop")
     from tools import circle_crop
     
@@ -46,6 +82,12 @@ try:
     print("  ✓ ui.controls")
     from ui import controls
     
+    print("  ✓ ui.jobs")
+    from ui import jobs
+    
+    print("  ✓ ui.scheduler")
+    from ui import scheduler
+    
     print("  ✓ ui.windows")
     from ui import windows
     
@@ -1,8 +1,8 @@
 # tools/circle_crop.py - Circle Cropping Tool
 
 import tkinter as tk
-from PIL import Image, ImageDraw
-from utils.image_ops import apply_circle_crop
+from utils.opgraph import CropNode
+from utils.perf import timed
 
 class CircleCropTool:
     def __init__(self, app):
@@ -15,6 +15,9 @@ class CircleCropTool:
         self.last_center_x = None
         self.last_center_y = None
         self.size_slider = None
+        self.overlay = None
+        self.base = None
+        self.edit_index = None
     
     def start(self):
         """Start circle cropping mode"""
@@ -23,10 +26,20 @@ class CircleCropTool:
             return
         
         self.cropping_mode = True
-        w, h = self.app.full_health_image.size
-        self.center_x = w // 2
-        self.center_y = h // 2
-        self.radius = min(w, h) // 2 - 10
+        graph = self.app.graph
+        self.edit_index = graph.find(CropNode)
+        if self.edit_index is not None:
+            # Re-crop the image as it was before the crop; later edits are replayed
+            self.base = graph.render(upto=self.edit_index)
+            w, h = self.base.size
+            self.center_x, self.center_y, self.radius = (
+                int(v) for v in graph.nodes[self.edit_index].pixels(w))
+        else:
+            self.base = self.app.full_health_image
+            w, h = self.base.size
+            self.center_x = w // 2
+            self.center_y = h // 2
+            self.radius = min(w, h) // 2 - 10
         
         self.app.set_instructions(
             "Circle Cropper:\n\n- Move circle with mouse\n- Adjust size with slider\n- Click canvas to confirm"
@@ -55,51 +68,56 @@ class CircleCropTool:
         """Update circle radius from slider"""
         self.radius = int(value)
         if self.cropping_mode:
-            self.show_preview()
+            self.app.frames.post("crop", self.flush_update)
     
     def on_mouse_move(self, event):
         """Update circle position as mouse moves"""
-        if not self.cropping_mode or not self.app.full_health_image:
+        if not self.cropping_mode or self.base is None:
+            return
+        self.app.frames.post("crop", self.flush_update, (event.x, event.y))
+    
+    @timed("crop.move")
+    def flush_update(self, positions):
+        """Apply the frame's mouse movement and move the overlay"""
+        if not self.cropping_mode or self.base is None:
             return
         
-        cw = self.app.canvas.winfo_width() or 800
-        ch = self.app.canvas.winfo_height() or 800
-        w, h = self.app.full_health_image.size
-        
-        # Convert canvas coords to image coords
-        self.center_x = int((event.x - cw/2) * w / cw + w/2)
-        self.center_y = int((event.y - ch/2) * h / ch + h/2)
+        w, h = self.base.size
+        if positions:
+            # Only the latest position matters
+            self.center_x, self.center_y = self.app.canvas_to_image(
+                *positions[-1], self.base)
         
         # Clamp to image bounds
         self.center_x = max(self.radius, min(w - self.radius, self.center_x))
         self.center_y = max(self.radius, min(h - self.radius, self.center_y))
         
-        self.show_preview()
+        self.update_overlay()
     
+    @timed("crop.preview")
     def show_preview(self):
-        """Show circle outline on preview"""
-        if not self.app.full_health_image:
+        """Render the base preview once and draw the circle overlay on top"""
+        if self.base is None:
             return
         
-        cw = self.app.canvas.winfo_width() or 800
-        ch = self.app.canvas.winfo_height() or 800
-        
-        preview = self.app.full_health_image.copy()
-        preview.thumbnail((cw, ch), Image.Resampling.LANCZOS)
-        
-        w, h = self.app.full_health_image.size
-        pw, ph = preview.size
-        sx = pw / w
-        sy = ph / h
-        
-        draw = ImageDraw.Draw(preview)
-        cx = int(self.center_x * sx)
-        cy = int(self.center_y * sy)
-        r = int(self.radius * sx)
-        
-        draw.ellipse((cx-r, cy-r, cx+r, cy+r), outline=(255, 255, 255), width=3)
-        
-        self.app.update_canvas_preview(preview)
+        self.app.update_preview(self.base)
+        self.app.canvas.delete("overlay")
+        self.overlay = None
+        self.update_overlay()
+    
+    def update_overlay(self):
+        """Move the circle outline canvas item to the current circle"""
+        img = self.base
+        x1, y1 = self.app.image_to_canvas(self.center_x - self.radius,
+                                          self.center_y - self.radius, img)
+        x2, y2 = self.app.image_to_canvas(self.center_x + self.radius,
+                                          self.center_y + self.radius, img)
+        
+        if self.overlay is None:
+            self.overlay = self.app.canvas.create_oval(x1, y1, x2, y2, outline="#ffffff",
+                                                       width=3, tags="overlay")
+        else:
+            self.app.canvas.coords(self.overlay, x1, y1, x2, y2)
     
     def on_canvas_click(self, event):
         """Apply circle crop when canvas is clicked"""
@@ -109,7 +127,7 @@ class CircleCropTool:
     
     def apply(self):
         """Apply circle crop to image"""
-        if not self.app.full_health_image:
+        if self.base is None:
             return
         
         self.cleanup()
@@ -119,13 +137,24 @@ class CircleCropTool:
         self.last_center_x = self.center_x
         self.last_center_y = self.center_y
         
-        # Apply crop
-        self.app.full_health_image = apply_circle_crop(
-            self.app.full_health_image, 
-            self.center_x, 
-            self.center_y, 
-            self.radius
-        )
+        graph = self.app.graph
+        base = self.base
+        node = CropNode.from_pixels(base.width, self.center_x, self.center_y, self.radius)
+        if self.edit_index is None:
+            nodes = graph.nodes + [node]
+            work = lambda: node.apply(base)
+        else:
+            # Only the nodes after the crop are re-rendered
+            nodes = graph.replaced(self.edit_index, node)
+            work = lambda: graph.render(nodes=nodes)
+        
+        self.app.jobs.submit("crop", work, on_done=lambda img: self.on_applied(img, nodes),
+                             label="Cropping")
+    
+    def on_applied(self, cropped, nodes):
+        """Store the cropped image and return to the step"""
+        self.app.apply_edit(cropped, nodes)
+        self.base = None
         
         self.app.show_info("Circle crop applied!")
         self.app.update_preview(self.app.full_health_image)
@@ -134,6 +163,8 @@ class CircleCropTool:
     def cancel(self):
         """Cancel cropping"""
         self.cleanup()
+        self.base = None
+        self.app.update_preview(self.app.full_health_image)
         self.app.current_step_handler.show()
     
     def cleanup(self):
@@ -141,3 +172,6 @@ class CircleCropTool:
         self.app.canvas.unbind("<Motion>")
         self.app.canvas.unbind("<Button-1>")
         self.cropping_mode = False
+        self.app.frames.cancel("crop")
+        self.app.canvas.delete("overlay")
+        self.overlay = None
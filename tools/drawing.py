@@ -1,7 +1,10 @@
 # tools/drawing.py - Drawing and Eraser Tools
 
 import tkinter as tk
-from PIL import ImageDraw
+from utils.stroke import StrokeEngine, paint, erase, batches, stamp_box
+from utils.history import TileSnapshot
+from utils.opgraph import StrokeNode
+from utils.perf import timed
 
 class DrawingTool:
     def __init__(self, app):
@@ -9,6 +12,11 @@ class DrawingTool:
         self.drawing_enabled = False
         self.drawing_tool = "brush"
         self.brush_size = 5
+        self.brush_hardness = 1.0
+        self.stroke = StrokeEngine()
+        self.before = None
+        self.dirty = []
+        self.points = []
     
     def start(self):
         """Start drawing mode"""
@@ -43,39 +51,92 @@ class DrawingTool:
         ss.set(5)
         ss.pack(pady=5)
         
+        soft_var = tk.BooleanVar(value=self.brush_hardness < 1.0)
+        tk.Checkbutton(self.app.control_frame, text="Soft Edges", variable=soft_var,
+                      command=lambda: setattr(self, 'brush_hardness', 0.5 if soft_var.get() else 1.0),
+                      bg=self.app.PANEL, fg=self.app.TEXT, selectcolor=self.app.PANEL).pack(anchor="w")
+        
+        self.app.canvas.bind("<Button-1>", self.on_press)
         self.app.canvas.bind("<B1-Motion>", self.draw_on_canvas)
-        self.app.canvas.bind("<Button-1>", self.draw_on_canvas)
+        self.app.canvas.bind("<ButtonRelease-1>", self.on_release)
         
         self.app.add_button("Done", self.finish)
     
-    def draw_on_canvas(self, event):
-        """Draw or erase on canvas"""
+    @timed("draw.press")
+    def on_press(self, event):
+        """Start a stroke"""
         if not self.app.full_health_image or not self.drawing_enabled:
             return
         
-        cw = self.app.canvas.winfo_width() or 800
-        ch = self.app.canvas.winfo_height() or 800
-        iw, ih = self.app.full_health_image.size
+        # Undo state; stamp() copies each tile just before the stroke first touches it
+        self.before = TileSnapshot(self.app.full_health_image)
+        self.dirty = []
+        self.points = []
+        
+        x, y = self.app.canvas_to_image(event.x, event.y, self.app.full_health_image)
+        self.stamp(self.stroke.begin(x, y))
+    
+    def draw_on_canvas(self, event):
+        """Queue the mouse position; the stroke is extended once per frame"""
+        if not self.app.full_health_image or not self.drawing_enabled:
+            return
+        self.app.frames.post("draw", self.draw_moves, (event.x, event.y))
+    
+    @timed("draw.drag")
+    def draw_moves(self, positions):
+        """Draw or erase along the stroke through a frame's mouse positions"""
+        img = self.app.full_health_image
+        if not img or not self.drawing_enabled or self.before is None:
+            return
         
-        x = int((event.x - cw/2) * iw / cw + iw/2)
-        y = int((event.y - ch/2) * ih / ch + ih/2)
+        points = []
+        for pos in positions:
+            x, y = self.app.canvas_to_image(*pos, img)
+            points.extend(self.stroke.move_to(x, y, self.brush_size))
+        self.stamp(points)
+    
+    def on_release(self, event):
+        """End the stroke"""
+        self.app.frames.flush("draw")
+        self.stroke.end()
+        self.record_stroke()
+    
+    @timed("draw.commit")
+    def record_stroke(self):
+        """Record the finished stroke in the op graph and undo history"""
+        if self.before is not None and self.points:
+            img = self.app.full_health_image
+            node = StrokeNode.from_pixels(img.width, self.drawing_tool, self.points,
+                                          self.brush_size, (0, 0, 0, 255), self.brush_hardness)
+            self.app.apply_edit(img, self.app.graph.nodes + [node], self.before, self.dirty)
+        self.before = None
+        self.dirty = []
+        self.points = []
+    
+    def stamp(self, points):
+        """Stamp the brush at points and refresh the touched preview region"""
+        img = self.app.full_health_image
+        self.before.capture([stamp_box(b, self.brush_size) for b in batches(points)])
+        if self.drawing_tool == "brush":
+            boxes = paint(img, points, self.brush_size, (0, 0, 0, 255), self.brush_hardness)
+        else:
+            boxes = erase(img, points, self.brush_size, self.brush_hardness)
         
-        if 0 <= x < iw and 0 <= y < ih:
-            draw = ImageDraw.Draw(self.app.full_health_image)
-            sz = self.brush_size
-            
-            if self.drawing_tool == "brush":
-                draw.ellipse([x-sz, y-sz, x+sz, y+sz], fill=(0,0,0,255))
-            else:
-                draw.ellipse([x-sz, y-sz, x+sz, y+sz], fill=(0,0,0,0))
-            
-            self.app.update_preview(self.app.full_health_image)
+        # Only the stroke's bounding boxes need re-sampling
+        self.points.extend(points)
+        self.dirty.extend(boxes)
+        for box in boxes:
+            self.app.update_preview_region(img, box)
     
     def finish(self):
         """Finish drawing mode"""
+        self.app.frames.flush("draw")
         self.drawing_enabled = False
+        self.stroke.end()
+        self.record_stroke()
         self.app.canvas.unbind("<B1-Motion>")
         self.app.canvas.unbind("<Button-1>")
+        self.app.canvas.unbind("<ButtonRelease-1>")
         self.app.current_step_handler.show()
 
 
@@ -84,17 +145,24 @@ class EraserTool:
         self.app = app
         self.eraser_enabled = False
         self.eraser_size = 15
-        self.last_eraser_pos = None
+        self.stroke = StrokeEngine()
+        self.before = None
+        self.dirty = []
     
     def start(self, step_num):
         """Start eraser tool for broken effects"""
-        if not self.app.broken_effect_image:
+        if not self.app.broken_effect_image or self.app.damage_mask is None:
             self.app.show_error("Load a broken reference first!")
             return
         
         self.eraser_enabled = True
         self.step_num = step_num
         
+        # Erasing edits the damage mask layer, so it has to be visible
+        self.app.layers.set_visible("mask", True)
+        self.app.broken_effect_image = self.app.layers.composite()
+        self.app.update_preview(self.app.broken_effect_image)
+        
         self.app.set_instructions(
             "Eraser Tool:\n- Draw on canvas to erase\n- Click 'Done Erasing' when finished"
         )
@@ -116,45 +184,81 @@ class EraserTool:
         self.eraser_size = max(5, min(50, self.eraser_size + delta))
         self.size_label.config(text=f"Size: {self.eraser_size}px")
     
+    def image_pos(self, cx, cy):
+        """Convert canvas coords to clamped image coords"""
+        img = self.app.broken_effect_image
+        iw, ih = img.size
+        x, y = self.app.canvas_to_image(cx, cy, img)
+        return max(0, min(iw - 1, x)), max(0, min(ih - 1, y))
+    
+    @timed("erase.press")
     def on_press(self, event):
-        """Record starting position"""
-        self.last_eraser_pos = (event.x, event.y)
+        """Start an eraser stroke"""
+        if not self.app.broken_effect_image or not self.eraser_enabled:
+            return
+        self.before = TileSnapshot(self.app.damage_mask)
+        self.dirty = []
+        self.erase_points(self.stroke.begin(*self.image_pos(event.x, event.y)))
     
     def on_drag(self, event):
-        """Erase as mouse drags"""
+        """Queue the mouse position; the stroke is extended once per frame"""
         if not self.app.broken_effect_image or not self.eraser_enabled:
             return
+        self.app.frames.post("erase", self.erase_moves, (event.x, event.y))
+    
+    @timed("erase.drag")
+    def erase_moves(self, positions):
+        """Erase along the stroke through a frame's mouse positions"""
+        if not self.app.broken_effect_image or not self.eraser_enabled or self.before is None:
+            return
         
-        cw = self.app.canvas.winfo_width() or 800
-        ch = self.app.canvas.winfo_height() or 800
-        iw, ih = self.app.broken_effect_image.size
-        
-        xr = iw / cw
-        yr = ih / ch
-        
-        x = int((event.x - cw//2) * xr + iw//2)
-        y = int((event.y - ch//2) * yr + ih//2)
-        
-        x = max(0, min(iw - 1, x))
-        y = max(0, min(ih - 1, y))
-        
-        draw = ImageDraw.Draw(self.app.broken_effect_image)
-        draw.ellipse((x - self.eraser_size//2, y - self.eraser_size//2,
-                     x + self.eraser_size//2, y + self.eraser_size//2),
-                    fill=(0, 0, 0, 0))
-        
-        self.app.update_preview(self.app.broken_effect_image)
+        points = []
+        for pos in positions:
+            x, y = self.image_pos(*pos)
+            points.extend(self.stroke.move_to(x, y, self.eraser_size//2))
+        self.erase_points(points)
     
     def on_release(self, event):
-        """Clear last position"""
-        self.last_eraser_pos = None
+        """End the eraser stroke"""
+        self.app.frames.flush("erase")
+        self.stroke.end()
+        self.record_stroke()
+    
+    @timed("erase.commit")
+    def record_stroke(self):
+        """Push the finished eraser stroke onto the undo history"""
+        if self.before is not None:
+            self.app.history.record("damage_mask", self.before,
+                                    self.app.damage_mask, self.dirty)
+        self.before = None
+        self.dirty = []
+    
+    def erase_points(self, points):
+        """Erase at points from the damage mask and refresh the touched preview region"""
+        radius = self.eraser_size//2
+        self.before.capture([stamp_box(b, radius) for b in batches(points)])
+        boxes = erase(self.app.damage_mask, points, radius)
+        if not boxes:
+            return
+        for box in boxes:
+            self.app.layers.mark_dirty("mask", box)
+        
+        # Only the erased boxes of the mask layer are recombined
+        img = self.app.layers.composite()
+        self.app.broken_effect_image = img
+        for box in boxes:
+            self.dirty.append(box)
+            self.app.update_preview_region(img, box)
     
     def stop(self):
         """Stop eraser mode"""
         self.app.canvas.unbind("<Button-1>")
         self.app.canvas.unbind("<B1-Motion>")
         self.app.canvas.unbind("<ButtonRelease-1>")
+        self.app.frames.flush("erase")
         self.eraser_enabled = False
+        self.stroke.end()
+        self.record_stroke()
         
         self.app.show_info("Erasing complete!")
         
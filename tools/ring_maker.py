@@ -2,8 +2,11 @@
 
 import tkinter as tk
 from tkinter import colorchooser, simpledialog, messagebox
-from PIL import Image, ImageDraw
+from utils.cache import LRUCache, image_token
+from utils.image_ops import make_circular, add_ring, ring_layer
+from utils.layers import LayerStack
 from utils.presets import save_presets
+from utils.opgraph import RingNode
 
 class RingMakerTool:
     def __init__(self, app):
@@ -12,6 +15,11 @@ class RingMakerTool:
         self.ring_thickness = 20
         self.ring_slider = None
         self.ring_color_swatch = None
+        self.base_cache = LRUCache(max_entries=2)
+        self.layers = LayerStack()
+        self.source = None
+        self.circle = (None, None, None)
+        self.edit_index = None
     
     def start(self):
         """Start ring maker mode"""
@@ -19,8 +27,21 @@ class RingMakerTool:
             self.app.show_error("Load an image first!")
             return
         
-        self.ring_thickness = 20
-        w, h = self.app.full_health_image.size
+        graph = self.app.graph
+        self.edit_index = graph.find(RingNode)
+        if self.edit_index is not None:
+            # Re-ring the image as it was before the ring; later edits are replayed
+            node = graph.nodes[self.edit_index]
+            self.source = graph.render(upto=self.edit_index)
+            w = self.source.width
+            self.circle = node.pixels(w) if node.circle else (None, None, None)
+            self.ring_color = node.color
+            self.ring_thickness = max(1, round(node.thickness * w))
+        else:
+            crop = self.app.circle_crop
+            self.source = self.app.full_health_image
+            self.circle = (crop.last_center_x, crop.last_center_y, crop.last_radius)
+            self.ring_thickness = 20
         
         self.app.set_instructions(
             "Ring Maker:\n- Pick color and adjust thickness\n- Save/Load presets\n- Click 'Done' to apply"
@@ -146,88 +167,67 @@ class RingMakerTool:
                  font=("Consolas", 10), bg=self.app.ACCENT, fg=self.app.BTN_TXT,
                  activebackground=self.app.BTN_HOVER, relief="flat").pack(pady=10)
     
+    def circular_base(self):
+        """Circular base of the ring's source image, computed once per revision"""
+        img = self.source
+        key = (image_token(img), self.circle)
+        return self.base_cache.get_or_create(key, lambda: make_circular(img, *self.circle))
+    
+    def render(self, size=None):
+        """Render the circular base with the current ring, at preview size if given"""
+        # Previews go through the art and ring layers, so slider changes only redo the ring
+        base = self.circular_base()
+        thickness = self.ring_thickness
+        if not size:
+            return add_ring(base, self.ring_color, thickness)
+        
+        full = base.size[0]
+        base = self.app.preview_cache.thumbnail(base, size)
+        thickness = max(1, round(thickness * base.size[0] / full))
+        with self.layers.lock:
+            self.layers.set("art", base)
+            self.layers.set("ring", ring_layer(base.size[0], tuple(self.ring_color), thickness))
+            return self.layers.composite()
+    
     def update_preview(self, value=None):
         """Update ring preview on canvas"""
         if value is not None:
             self.ring_thickness = int(value)
         
-        if not self.app.full_health_image:
+        if self.source is None:
             return
         
-        img = self.app.full_health_image.copy()
-        w, h = img.size
-        
-        # Use saved circle data if available
-        if (self.app.circle_crop.last_radius and 
-            self.app.circle_crop.last_center_x is not None):
-            sz = int(self.app.circle_crop.last_radius * 2)
-            canvas = Image.new("RGBA", (sz, sz), (0, 0, 0, 0))
-            
-            px = int(self.app.circle_crop.last_radius - self.app.circle_crop.last_center_x)
-            py = int(self.app.circle_crop.last_radius - self.app.circle_crop.last_center_y)
-            canvas.paste(img, (px, py), img)
-            circular = canvas
-        else:
-            # Fallback
-            sz = min(w, h)
-            left = (w - sz) // 2
-            top = (h - sz) // 2
-            cropped = img.crop((left, top, left + sz, top + sz))
-            
-            mask = Image.new("L", (sz, sz), 0)
-            draw = ImageDraw.Draw(mask)
-            draw.ellipse((0, 0, sz - 1, sz - 1), fill=255)
-            
-            circular = Image.new("RGBA", (sz, sz))
-            circular.paste(cropped, (0, 0), mask)
-        
-        # Add ring
-        sz = circular.size[0]
-        ring = Image.new("RGBA", (sz, sz), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(ring)
-        draw.ellipse((0, 0, sz - 1, sz - 1), outline=self.ring_color, width=self.ring_thickness)
-        
-        result = Image.alpha_composite(circular, ring)
-        self.app.update_preview(result)
+        cw = self.app.canvas.winfo_width() or 800
+        ch = self.app.canvas.winfo_height() or 800
+        
+        # A newer slider value supersedes any preview still rendering
+        self.app.jobs.submit("ring_preview", self.render, (cw, ch),
+                             on_done=self.app.update_canvas_preview)
     
     def apply(self):
         """Apply ring to image permanently"""
-        if not self.app.full_health_image:
+        if self.source is None:
             return
         
-        img = self.app.full_health_image.copy()
-        w, h = img.size
-        
-        # Same logic as preview
-        if (self.app.circle_crop.last_radius and 
-            self.app.circle_crop.last_center_x is not None):
-            sz = int(self.app.circle_crop.last_radius * 2)
-            canvas = Image.new("RGBA", (sz, sz), (0, 0, 0, 0))
-            
-            px = int(self.app.circle_crop.last_radius - self.app.circle_crop.last_center_x)
-            py = int(self.app.circle_crop.last_radius - self.app.circle_crop.last_center_y)
-            canvas.paste(img, (px, py), img)
-            circular = canvas
+        graph = self.app.graph
+        node = RingNode.from_pixels(self.source.width, *self.circle, self.ring_color,
+                                    self.ring_thickness)
+        if self.edit_index is None:
+            nodes = graph.nodes + [node]
+            work = self.render
         else:
-            sz = min(w, h)
-            left = (w - sz) // 2
-            top = (h - sz) // 2
-            cropped = img.crop((left, top, left + sz, top + sz))
-            
-            mask = Image.new("L", (sz, sz), 0)
-            draw = ImageDraw.Draw(mask)
-            draw.ellipse((0, 0, sz - 1, sz - 1), fill=255)
-            
-            circular = Image.new("RGBA", (sz, sz))
-            circular.paste(cropped, (0, 0), mask)
-        
-        sz = circular.size[0]
-        ring = Image.new("RGBA", (sz, sz), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(ring)
-        draw.ellipse((0, 0, sz - 1, sz - 1), outline=self.ring_color, width=self.ring_thickness)
-        
-        result = Image.alpha_composite(circular, ring)
-        self.app.full_health_image = result
+            # Only the nodes after the ring are re-rendered
+            nodes = graph.replaced(self.edit_index, node)
+            work = lambda: graph.render(nodes=nodes)
+        
+        self.app.jobs.cancel("ring_preview")
+        self.app.jobs.submit("ring_apply", work, on_done=lambda img: self.on_applied(img, nodes),
+                             label="Applying ring")
+    
+    def on_applied(self, result, nodes):
+        """Store the ringed image and return to the step"""
+        self.app.apply_edit(result, nodes)
+        self.source = None
         self.app.update_preview(result)
         
         self.app.canvas.unbind("<Motion>")
@@ -1,7 +1,8 @@
 # tools/transform.py - Transform Tools (Flip, Rotate, Zoom)
 
-from PIL import Image
-from utils.image_ops import flip_image, rotate_image
+from utils.opgraph import FlipNode, RotateNode
+from utils.mipmap import zoomed
+from utils.perf import monitor, timed
 
 class TransformTool:
     def __init__(self, app):
@@ -14,9 +15,11 @@ class TransformTool:
             self.app.show_error("Load an image first!")
             return
         
-        self.app.full_health_image = flip_image(self.app.full_health_image, "horizontal")
-        self.zoom_level = 1.0
-        self.app.update_preview(self.app.full_health_image)
+        with monitor.measure("transform.flip"):
+            node = FlipNode("horizontal")
+            self.app.apply_edit(node.apply(self.app.full_health_image), self.app.graph.nodes + [node])
+            self.zoom_level = 1.0
+            self.app.update_preview(self.app.full_health_image)
         self.app.show_info("Image flipped horizontally!")
     
     def flip_vertical(self):
@@ -25,9 +28,11 @@ class TransformTool:
             self.app.show_error("Load an image first!")
             return
         
-        self.app.full_health_image = flip_image(self.app.full_health_image, "vertical")
-        self.zoom_level = 1.0
-        self.app.update_preview(self.app.full_health_image)
+        with monitor.measure("transform.flip"):
+            node = FlipNode("vertical")
+            self.app.apply_edit(node.apply(self.app.full_health_image), self.app.graph.nodes + [node])
+            self.zoom_level = 1.0
+            self.app.update_preview(self.app.full_health_image)
         self.app.show_info("Image flipped vertically!")
     
     def rotate_90(self):
@@ -36,9 +41,11 @@ class TransformTool:
             self.app.show_error("Load an image first!")
             return
         
-        self.app.full_health_image = rotate_image(self.app.full_health_image, 90)
-        self.zoom_level = 1.0
-        self.app.update_preview(self.app.full_health_image)
+        with monitor.measure("transform.rotate"):
+            node = RotateNode(90)
+            self.app.apply_edit(node.apply(self.app.full_health_image), self.app.graph.nodes + [node])
+            self.zoom_level = 1.0
+            self.app.update_preview(self.app.full_health_image)
         self.app.show_info("Image rotated 90 degrees!")
     
     def zoom_in(self):
@@ -60,16 +67,16 @@ class TransformTool:
         self.zoom_level = 1.0
         self.app.update_preview(self.app.full_health_image)
     
+    @timed("transform.zoom")
     def apply_zoom(self):
         """Apply current zoom level to preview"""
         if not self.app.full_health_image:
             return
         
-        img = self.app.full_health_image.copy()
+        img = self.app.full_health_image
         cw = self.app.canvas.winfo_width() or 800
         ch = self.app.canvas.winfo_height() or 800
         
-        new_sz = int(min(cw, ch) * self.zoom_level)
-        img.thumbnail((new_sz, new_sz), Image.Resampling.LANCZOS)
-        
-        self.app.update_canvas_preview(img)
+        # 1.0 matches update_preview (fit, never upscaled); above that magnifies
+        fit = min(1.0, cw / img.width, ch / img.height)
+        self.app.update_canvas_preview(zoomed(img, fit * self.zoom_level, (cw, ch)))
@@ -2,7 +2,62 @@
 
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
+from PIL import ImageTk
+from utils.cache import image_token
+from utils.export import encode_png
+from utils.perf import monitor, timed
+
+
+class PhotoBuffer:
+    """A Tk photo that is pasted into again for images of the same size and mode"""
+    
+    def __init__(self):
+        self.photo = None
+        self.format = None
+    
+    def update(self, img):
+        """Return a photo showing img, reusing the current one when it fits"""
+        fmt = (img.mode, img.size)
+        if self.photo is not None and fmt == self.format:
+            self.photo.paste(img)
+        else:
+            self.photo = ImageTk.PhotoImage(img)
+            self.format = fmt
+        return self.photo
+
+
+class CanvasPhoto:
+    """One long-lived image item on a canvas, kept below every other item"""
+    
+    def __init__(self, canvas, anchor="center"):
+        self.canvas = canvas
+        self.anchor = anchor
+        self.buffer = PhotoBuffer()
+        self.item = None
+    
+    @property
+    def photo(self):
+        return self.buffer.photo
+    
+    def show(self, img, x, y):
+        """Show img with its anchor at canvas position (x, y)"""
+        old = self.buffer.photo
+        photo = self.buffer.update(img)
+        if self.item is None:
+            self.item = self.canvas.create_image(x, y, image=photo, anchor=self.anchor)
+            self.canvas.tag_lower(self.item)
+            return
+        if photo is not old:
+            self.canvas.itemconfig(self.item, image=photo)
+        self.canvas.coords(self.item, x, y)
+    
+    def clear(self):
+        """Remove the item and drop the photo"""
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.item = None
+        self.buffer = PhotoBuffer()
+
 
 class UIControls:
     """Base class with UI helper methods"""
@@ -28,6 +83,10 @@ class UIControls:
         """Set instruction label text"""
         self.instruction_label.config(text=text)
     
+    def set_status(self, text):
+        """Set status bar text"""
+        self.status_label.config(text=text)
+    
     def show_error(self, message):
         """Show error message box"""
         messagebox.showerror("Error", message)
@@ -36,6 +95,24 @@ class UIControls:
         """Show info message box"""
         messagebox.showinfo("Info", message)
     
+    def save_png(self, path, render, on_saved, backup=None):
+        """Encode render() once on a worker and atomically write it (and its .backup)"""
+        # render may only use what the caller captured on the Tk thread
+        lvl = self.settings["png_compress_level"]
+        quant = self.settings["png_quantize"]
+        if backup is None:
+            backup = self.settings["auto_backup"]
+        
+        def work():
+            data = encode_png(render(), lvl, quant)
+            self.saver.save(path, data, backup)
+            return path
+        
+        self.jobs.submit("save", work, on_done=on_saved,
+                         on_error=lambda e: self.show_error(f"Save failed: {e}"),
+                         label="Saving")
+    
+    @timed("preview.update")
     def update_preview(self, img):
         """Update preview canvas with image"""
         if not img:
@@ -44,13 +121,59 @@ class UIControls:
         cw = self.canvas.winfo_width() or 800
         ch = self.canvas.winfo_height() or 800
         
-        preview = img.copy()
-        preview.thumbnail((cw, ch), Image.Resampling.LANCZOS)
+        # Cached per image revision, so unchanged images are never resampled twice
+        preview = self.preview_cache.thumbnail(img, (cw, ch))
         
-        self.preview_image = ImageTk.PhotoImage(preview)
-        self.canvas.delete("all")
-        self.canvas.create_image(cw//2, ch//2, image=self.preview_image)
+        self.preview_photo.show(preview, cw//2, ch//2)
+        self.preview_key = (image_token(img), (cw, ch))
+        monitor.frame()
     
+    @timed("preview.region")
+    def update_preview_region(self, img, box):
+        """Refresh only the part of the preview covering box of an image edited in place"""
+        if not img:
+            return
+        
+        cw = self.canvas.winfo_width() or 800
+        ch = self.canvas.winfo_height() or 800
+        
+        shown = getattr(self, "preview_key", None) == (image_token(img), (cw, ch))
+        patched = self.preview_cache.patch(img, box, (cw, ch))
+        if not shown or not patched:
+            self.update_preview(img)
+            return
+        
+        preview, (x0, y0, x1, y1) = patched
+        if x1 <= x0 or y1 <= y0:
+            return
+        
+        # Copy the patched pixels into the photo already on the canvas; "set"
+        # replaces them, so erased (transparent) pixels don't keep the old ones
+        patch = self.patch_buffer.update(preview.crop((x0, y0, x1, y1)))
+        self.canvas.tk.call(str(self.preview_photo.photo), "copy", str(patch),
+                            "-to", x0, y0, "-compositingrule", "set")
+        self.preview_key = (image_token(img), (cw, ch))
+        monitor.frame()
+    
+    def preview_geometry(self, img):
+        """Return (scale_x, scale_y, left, top) of img as shown by update_preview"""
+        cw = self.canvas.winfo_width() or 800
+        ch = self.canvas.winfo_height() or 800
+        pw, ph = self.preview_cache.thumbnail(img, (cw, ch)).size
+        w, h = img.size
+        return pw / w, ph / h, cw//2 - pw//2, ch//2 - ph//2
+    
+    def canvas_to_image(self, x, y, img):
+        """Convert canvas coords to image coords"""
+        sx, sy, left, top = self.preview_geometry(img)
+        return int((x - left) / sx), int((y - top) / sy)
+    
+    def image_to_canvas(self, x, y, img):
+        """Convert image coords to canvas coords"""
+        sx, sy, left, top = self.preview_geometry(img)
+        return left + x * sx, top + y * sy
+    
+    @timed("preview.canvas")
     def update_canvas_preview(self, img):
         """Update canvas with already-sized image"""
         if not img:
@@ -59,6 +182,11 @@ class UIControls:
         cw = self.canvas.winfo_width() or 800
         ch = self.canvas.winfo_height() or 800
         
-        self.preview_image = ImageTk.PhotoImage(img)
-        self.canvas.delete("all")
-        self.canvas.create_image(cw//2, ch//2, image=self.preview_image)
+        self.preview_photo.show(img, cw//2, ch//2)
+        self.preview_key = None
+        monitor.frame()
+    
+    def clear_preview(self):
+        """Remove the preview image from the canvas"""
+        self.preview_photo.clear()
+        self.preview_key = None
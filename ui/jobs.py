@@ -0,0 +1,145 @@
+# ui/jobs.py - Background worker jobs for heavy image operations
+
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils.perf import monitor
+
+# How often the Tk side checks for finished jobs
+POLL_MS = 15
+
+# Jobs that finish faster than this never show progress in the status bar
+PROGRESS_DELAY = 0.25
+
+
+class Job:
+    """Handle for one submitted job; workers can report progress or check cancellation"""
+
+    def __init__(self, runner, key, label):
+        self.runner = runner
+        self.key = key
+        self.label = label
+        self.cancelled = False
+        self.fraction = None
+        self.started = time.perf_counter()
+        self.future = None
+
+    def progress(self, fraction):
+        """Report progress (0..1) from the worker thread"""
+        self.fraction = fraction
+        self.runner.results.put((self, "progress", fraction))
+
+    def cancel(self):
+        """Mark the job stale; its result will be dropped"""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class JobRunner:
+    """Runs Pillow work on a thread pool; a new job under a running key supersedes it"""
+
+    def __init__(self, root, on_status=None, workers=2):
+        self.root = root
+        self.on_status = on_status
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.results = queue.Queue()
+        self.active = {}
+        self.poll_job = None
+
+    def submit(self, key, fn, *args, on_done=None, on_error=None, label=None,
+               with_job=False):
+        """Run fn(*args) in the background, then call on_done(result) on the Tk thread"""
+        old = self.active.get(key)
+        if old is not None:
+            old.cancel()
+
+        job = Job(self, key, label)
+        job.on_done = on_done
+        job.on_error = on_error
+        self.active[key] = job
+
+        def run():
+            if job.cancelled:
+                return
+            try:
+                with monitor.measure(f"job.{key}"):
+                    # with_job lets fn report progress through job=
+                    result = fn(*args, job=job) if with_job else fn(*args)
+                self.results.put((job, "done", result))
+            except Exception as e:
+                self.results.put((job, "error", e))
+
+        job.future = self.pool.submit(run)
+        self._schedule_poll()
+        return job
+
+    def cancel(self, key):
+        """Cancel the job running under key, if any"""
+        job = self.active.pop(key, None)
+        if job is not None:
+            job.cancel()
+        self._update_status()
+
+    def busy(self, key=None):
+        """True if any job (or the job under key) is still pending"""
+        return key in self.active if key else bool(self.active)
+
+    def wait(self, keys, timeout=None):
+        """Block until the jobs under keys have run; their callbacks are not delivered"""
+        wait([j.future for k, j in self.active.items() if k in keys], timeout=timeout)
+
+    def _schedule_poll(self):
+        if self.poll_job is None:
+            self.poll_job = self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        """Deliver finished results on the Tk thread"""
+        self.poll_job = None
+        while True:
+            try:
+                job, kind, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            # A newer job under the same key makes this one stale
+            if job.cancelled or self.active.get(job.key) is not job:
+                continue
+            if kind == "progress":
+                continue
+
+            del self.active[job.key]
+            if kind == "done" and job.on_done:
+                job.on_done(value)
+            elif kind == "error":
+                if job.on_error:
+                    job.on_error(value)
+                else:
+                    print(f"Job {job.key} failed: {value}")
+
+        self._update_status()
+        if self.active:
+            self._schedule_poll()
+
+    def _update_status(self):
+        """Show the slowest labelled job in the status bar"""
+        if not self.on_status:
+            return
+        now = time.perf_counter()
+        shown = [j for j in self.active.values()
+                 if j.label and now - j.started >= PROGRESS_DELAY]
+        if not shown:
+            self.on_status("")
+            return
+        job = min(shown, key=lambda j: j.started)
+        if job.fraction is not None:
+            self.on_status(f"{job.label}... {int(job.fraction * 100)}%")
+        else:
+            self.on_status(f"{job.label}...")
+
+    def shutdown(self):
+        """Stop accepting work and drop pending jobs"""
+        for job in self.active.values():
+            job.cancel()
+        self.active.clear()
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,78 @@
+# ui/scheduler.py - Frame-paced batching of canvas input
+
+import time
+from utils.perf import monitor
+
+# One display frame at ~60 fps
+FRAME_MS = 16
+
+
+class FrameScheduler:
+    """Collects input events per key and applies each batch at most once per display frame"""
+
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.pending = {}
+        self.job = None
+        self.flushing = False
+        self.last_frame = 0.0
+
+    def post(self, key, apply, event=None):
+        """Queue event for apply(events) on the next frame (event None just schedules)"""
+        entry = self.pending.get(key)
+        if entry is None:
+            entry = self.pending[key] = (apply, [])
+        if event is not None:
+            entry[1].append(event)
+        self._schedule()
+
+    def _schedule(self):
+        if self.job is not None or self.flushing:
+            return
+        wait = self.frame_ms - (time.perf_counter() - self.last_frame) * 1000
+        if wait <= 0:
+            self.job = self.root.after_idle(self._run)
+        else:
+            self.job = self.root.after(int(wait) + 1, self._run)
+
+    def _run(self):
+        self.job = None
+        self.flush()
+
+    def flush(self, key=None):
+        """Apply pending work now: everything, or only the batch under key"""
+        if key is not None:
+            entry = self.pending.pop(key, None)
+            if entry is not None:
+                with monitor.one_frame():
+                    entry[0](entry[1])
+            return
+
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        self.last_frame = time.perf_counter()
+        self.flushing = True
+        try:
+            # The region patches of all batches reach the screen as one frame
+            with monitor.one_frame():
+                while self.pending:
+                    key = next(iter(self.pending))
+                    apply, events = self.pending.pop(key)
+                    apply(events)
+        finally:
+            self.flushing = False
+            if self.pending:
+                # Left over after an error; retry next frame
+                self._schedule()
+
+    def cancel(self, key=None):
+        """Drop pending work: everything, or only the batch under key"""
+        if key is not None:
+            self.pending.pop(key, None)
+        else:
+            self.pending.clear()
+        if not self.pending and self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
@@ -2,9 +2,19 @@
 
 import tkinter as tk
 from tkinter import messagebox, filedialog, simpledialog
-from PIL import Image, ImageDraw, ImageOps, ImageTk
+from PIL import Image, ImageDraw, ImageOps
 import os
+import random
 from config import THEMES
+from utils.stroke import spray, union_box
+from utils.image_ops import load_image
+from utils.export import encode_png
+from utils.perf import monitor, image_bytes, format_bytes
+from ui.scheduler import FrameScheduler
+from ui.controls import CanvasPhoto
+
+# The performance panel redraws its report this often
+PERF_REFRESH_MS = 500
 
 class SettingsWindow:
     """Settings window manager"""
@@ -64,6 +74,10 @@ class SettingsWindow:
             "Image Processing": [
                 ("Ring Thickness Preset", "ring_thickness_preset", "scale", 1, 100),
                 ("Image Quality", "image_quality", "dropdown", ["low", "medium", "high"]),
+                ("Working Resolution (px)", "working_resolution", "dropdown",
+                 ["512", "1024", "2048", "4096"]),
+                ("PNG Compression Level", "png_compress_level", "scale", 0, 9),
+                ("PNG Palette (256 colors)", "png_quantize", "bool"),
             ],
             "View Options": [
                 ("Show Grid", "show_grid", "bool"),
@@ -72,7 +86,8 @@ class SettingsWindow:
             ],
             "Advanced": [
                 ("Animation Enabled", "animation_enabled", "bool"),
-                ("Undo History Limit", "undo_history_limit", "scale", 1, 50),
+                ("Undo History Limit", "undo_history_limit", "scale", 1, 1000),
+                ("Undo Memory (MB)", "undo_memory_mb", "scale", 8, 512),
                 ("Advanced Mode", "advanced_mode", "bool"),
             ],
         }
@@ -243,6 +258,8 @@ class DevMode:
             info += f"Full Health Saved: {app.full_health_saved}\n"
             info += f"Font Size: {app.settings.get('font_size', 'N/A')}\n"
             info += f"Zoom Level: {app.transform.zoom_level}\n"
+            pc = app.preview_cache.stats()
+            info += f"Preview Cache: {pc['hits']} hits / {pc['misses']} misses\n"
             messagebox.showinfo("Debug Info", info)
         
         def show_img_stats():
@@ -295,11 +312,7 @@ class DevMode:
             try:
                 img = app.full_health_image.copy()
                 img.thumbnail((64, 64), Image.Resampling.LANCZOS)
-                app.preview_image = ImageTk.PhotoImage(img)
-                app.canvas.delete("all")
-                cw = app.canvas.winfo_width() or 800
-                ch = app.canvas.winfo_height() or 800
-                app.canvas.create_image(cw//2, ch//2, image=app.preview_image)
+                app.update_canvas_preview(img)
                 messagebox.showinfo("Test Export", "64x64 preview shown on canvas!")
             except Exception as e:
                 messagebox.showerror("Error", f"Export failed:\n{str(e)}")
@@ -315,6 +328,9 @@ class DevMode:
                 except Exception as e:
                     messagebox.showerror("Error", f"Reset failed:\n{str(e)}")
         
+        def open_perf():
+            PerfPanel.open(app)
+        
         def open_bdce():
             try:
                 BDCEEditor.open(app)
@@ -328,6 +344,7 @@ class DevMode:
             ("Clear All Presets", clear_presets),
             ("Reset Settings", reset_settings),
             ("Test Export (64x64)", test_exp),
+            ("Performance Monitor", open_perf),
             ("Broken Dot Creator (BDCE)", open_bdce),
             ("Reset Application", reset),
             ("Close Dev Menu", dm.destroy),
@@ -340,9 +357,98 @@ class DevMode:
                      width=30).pack(pady=4)
 
 
+class PerfPanel:
+    """Live operation latencies, preview frame rate and image memory"""
+    
+    # Images held on the app whose memory is listed
+    IMAGES = ("full_health_image", "broken_effect_image",
+              "medium_health_image", "low_health_image")
+    
+    @staticmethod
+    def text(app):
+        """Current report as monospaced text"""
+        lines = [f"Preview: {monitor.fps():.0f} fps", "",
+                 f"{'operation':<20}{'n':>5}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"]
+        for name, row in monitor.report().items():
+            lines.append(f"{name:<20}{row['count']:>5}{row['p50']:>9.1f}{row['p90']:>9.1f}"
+                         f"{row['p99']:>9.1f}{row['max']:>9.1f}")
+        lines.append("(milliseconds)")
+        
+        lines += ["", "Image memory:"]
+        total = 0
+        for attr in PerfPanel.IMAGES:
+            img = getattr(app, attr, None)
+            n = image_bytes(img)
+            total += n
+            size = f"{img.width}x{img.height} {img.mode}" if img else "-"
+            lines.append(f"  {attr:<22}{size:>16}{format_bytes(n):>11}")
+        
+        # Tk photos hold 4 bytes per pixel
+        photo = app.preview_photo.photo
+        n = photo.width() * photo.height() * 4 if photo else 0
+        total += n
+        size = f"{photo.width()}x{photo.height()}" if photo else "-"
+        lines.append(f"  {'preview':<22}{size:>16}{format_bytes(n):>11}")
+        lines.append(f"  {'total':<22}{'':>16}{format_bytes(total):>11}")
+        return "\n".join(lines)
+    
+    @staticmethod
+    def open(app):
+        """Open the performance window; it refreshes itself while open"""
+        pw = tk.Toplevel(app.root)
+        pw.title("Performance Monitor")
+        pw.geometry("640x560")
+        pw.configure(bg=app.BG)
+        pw.transient(app.root)
+        
+        tk.Label(pw, text="Performance Monitor", font=("Consolas", 14, "bold"),
+                fg=app.ACCENT, bg=app.BG).pack(pady=10)
+        
+        report = tk.Label(pw, text="", font=("Consolas", 9), fg=app.TEXT, bg=app.PANEL,
+                         justify="left", anchor="nw")
+        report.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        tick = [None]
+        
+        def refresh():
+            report.config(text=PerfPanel.text(app))
+            tick[0] = pw.after(PERF_REFRESH_MS, refresh)
+        
+        def close():
+            # A tick left pending would run against the destroyed window
+            if tick[0] is not None:
+                pw.after_cancel(tick[0])
+            pw.destroy()
+        
+        bf = tk.Frame(pw, bg=app.BG)
+        bf.pack(pady=10)
+        
+        tk.Button(bf, text="Reset Timings", command=monitor.reset, font=("Consolas", 10),
+                 bg=app.ACCENT, fg=app.BTN_TXT, activebackground=app.BTN_HOVER,
+                 relief="flat", width=15).pack(side="left", padx=5)
+        
+        tk.Button(bf, text="Close", command=close, font=("Consolas", 10),
+                 bg="#666", fg=app.BTN_TXT, activebackground="#888",
+                 relief="flat", width=15).pack(side="left", padx=5)
+        pw.protocol("WM_DELETE_WINDOW", close)
+        
+        refresh()
+
+
 class BDCEEditor:
     """Broken Dot Creator Editor"""
     
+    @staticmethod
+    def composite(bg_img, mask, box):
+        """Background with broken areas blacked out, for one region"""
+        if bg_img:
+            img = bg_img.crop(box)
+        else:
+            img = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]),
+                            (255, 255, 255, 255))
+        img.paste((0, 0, 0, 255), (0, 0), ImageOps.invert(mask.crop(box)))
+        return img
+    
     @staticmethod
     def open(app):
         """Open BDCE editor window"""
@@ -355,8 +461,10 @@ class BDCEEditor:
         # State
         bw.bg_img = None
         bw.mask = Image.new("L", (512, 512), 255)
-        bw.display = None
+        bw.comp = None
+        bw.frames = FrameScheduler(bw)
         bw.brush_sz = 20
+        bw.spray_rng = random.Random()
         
         # Left: canvas
         lf = tk.Frame(bw, bg=app.BG)
@@ -369,6 +477,7 @@ class BDCEEditor:
                        highlightthickness=2, highlightbackground=app.ACCENT)
         cnv.pack(pady=20, padx=20)
         bw.cnv = cnv
+        bw.display = CanvasPhoto(cnv, anchor="nw")
         
         # Right: controls
         rf = tk.Frame(bw, bg=app.PANEL, width=300)
@@ -385,23 +494,32 @@ class BDCEEditor:
         tk.Frame(rf, bg="#444444", height=2).pack(fill="x", padx=20, pady=10)
         
         # Functions
-        def upd_cnv():
+        def composite(box):
+            return BDCEEditor.composite(bw.bg_img, bw.mask, box)
+        
+        def redraw(_events=None):
             try:
-                if bw.bg_img:
-                    img = bw.bg_img.copy()
-                else:
-                    img = Image.new("RGBA", (512, 512), (255, 255, 255, 255))
-                
-                inv = ImageOps.invert(bw.mask)
-                blk = Image.new("RGBA", (512, 512), (0, 0, 0, 255))
-                img.paste(blk, (0, 0), inv)
-                
-                bw.display = ImageTk.PhotoImage(img)
-                bw.cnv.delete("all")
-                bw.cnv.create_image(0, 0, image=bw.display, anchor="nw")
+                with monitor.measure("bdce.redraw"):
+                    bw.display.show(bw.comp, 0, 0)
             except Exception as e:
                 print(f"Update error: {e}")
         
+        def schedule_redraw():
+            # At most one redraw per display frame
+            bw.frames.post("redraw", redraw)
+        
+        def upd_region(box):
+            box = (max(0, box[0]), max(0, box[1]), min(512, box[2]), min(512, box[3]))
+            if box[2] <= box[0] or box[3] <= box[1]:
+                return
+            with monitor.measure("bdce.region"):
+                bw.comp.paste(composite(box), box[:2])
+            schedule_redraw()
+        
+        def upd_cnv():
+            bw.comp = composite((0, 0, 512, 512))
+            schedule_redraw()
+        
         def load_ref():
             try:
                 p = filedialog.askopenfilename(
@@ -409,13 +527,21 @@ class BDCEEditor:
                     filetypes=[("Images", "*.png *.jpg *.jpeg *.bmp")])
                 
                 if p:
-                    img = Image.open(p).convert("RGBA")
-                    img = img.resize((512, 512), Image.Resampling.LANCZOS)
-                    bw.bg_img = img
-                    upd_cnv()
-                    messagebox.showinfo("Loaded", "Reference image loaded!")
+                    def work():
+                        return load_image(p, 512).resize((512, 512), Image.Resampling.LANCZOS)
+                    
+                    def loaded(img):
+                        bw.bg_img = img
+                        upd_cnv()
+                        messagebox.showinfo("Loaded", "Reference image loaded!")
+                    
+                    app.jobs.submit("bdce_load", work, on_done=loaded, on_error=load_failed,
+                                    label="Loading reference")
             except Exception as e:
-                messagebox.showerror("Error", f"Load failed:\n{str(e)}")
+                load_failed(e)
+        
+        def load_failed(e):
+            messagebox.showerror("Error", f"Load failed:\n{str(e)}")
         
         def clear():
             try:
@@ -441,41 +567,61 @@ class BDCEEditor:
                     filetypes=[("PNG", "*.png")])
                 
                 if p:
-                    out = Image.new("RGBA", (512, 512), (0, 0, 0, 0))
-                    blk = Image.new("RGBA", (512, 512), (0, 0, 0, 255))
-                    inv = ImageOps.invert(bw.mask)
-                    out.paste(blk, (0, 0), inv)
-                    out.save(p)
-                    messagebox.showinfo("Saved", f"Pattern saved to:\n{p}")
+                    mask = bw.mask.copy()
+                    
+                    def work():
+                        out = Image.new("RGBA", (512, 512), (0, 0, 0, 0))
+                        blk = Image.new("RGBA", (512, 512), (0, 0, 0, 255))
+                        inv = ImageOps.invert(mask)
+                        out.paste(blk, (0, 0), inv)
+                        app.saver.save(p, encode_png(out))
+                    
+                    def saved(_):
+                        messagebox.showinfo("Saved", f"Pattern saved to:\n{p}")
+                    
+                    app.jobs.submit("bdce_save", work, on_done=saved, on_error=save_failed,
+                                    label="Saving pattern")
             except Exception as e:
-                messagebox.showerror("Error", f"Save failed:\n{str(e)}")
+                save_failed(e)
+        
+        def save_failed(e):
+            messagebox.showerror("Error", f"Save failed:\n{str(e)}")
         
         def close():
+            bw.frames.cancel()
             bw.destroy()
         
+        # Mouse positions are collected and painted once per frame
         def paint_solid(event):
-            x, y = event.x, event.y
-            if 0 <= x < 512 and 0 <= y < 512:
-                r = bw.brush_sz
-                draw = ImageDraw.Draw(bw.mask)
-                draw.ellipse([x-r, y-r, x+r, y+r], fill=0)
-                upd_cnv()
+            bw.frames.post("solid", solid_moves, (event.x, event.y))
+        
+        def solid_moves(positions):
+            r = bw.brush_sz
+            draw = ImageDraw.Draw(bw.mask)
+            boxes = []
+            for x, y in positions:
+                if 0 <= x < 512 and 0 <= y < 512:
+                    draw.ellipse([x-r, y-r, x+r, y+r], fill=0)
+                    boxes.append((x-r, y-r, x+r+1, y+r+1))
+            if boxes:
+                upd_region(union_box(boxes))
+        
+        def start_spray(event):
+            # Finish the last stroke before reseeding
+            bw.frames.flush()
+            # A fixed seed makes every spray stroke reproducible
+            seed = seed_var.get().strip()
+            bw.spray_rng = random.Random(seed) if seed else random.Random()
+            paint_spray(event)
         
         def paint_spray(event):
-            import random
-            x, y = event.x, event.y
-            if 0 <= x < 512 and 0 <= y < 512:
-                r = bw.brush_sz
-                draw = ImageDraw.Draw(bw.mask)
-                for _ in range(max(10, r)):
-                    dx = random.randint(-r, r)
-                    dy = random.randint(-r, r)
-                    if dx*dx + dy*dy <= r*r:
-                        px, py = x + dx, y + dy
-                        if 0 <= px < 512 and 0 <= py < 512:
-                            sz = random.randint(1, 3)
-                            draw.ellipse([px-sz, py-sz, px+sz, py+sz], fill=0)
-                upd_cnv()
+            bw.frames.post("spray", spray_moves, (event.x, event.y))
+        
+        def spray_moves(positions):
+            boxes = [spray(bw.mask, x, y, bw.brush_sz, bw.spray_rng)
+                     for x, y in positions if 0 <= x < 512 and 0 <= y < 512]
+            if boxes:
+                upd_region(union_box(boxes))
         
         # UI
         ub = tk.Button(rf, text="📁 Load Reference Image", command=load_ref,
@@ -504,6 +650,14 @@ class BDCEEditor:
         szs.set(20)
         szs.pack(fill="x", pady=5)
         
+        sdf = tk.Frame(rf, bg=app.PANEL)
+        sdf.pack(pady=5, padx=10, fill="x")
+        tk.Label(sdf, text="Spray Seed:", fg=app.TEXT, bg=app.PANEL,
+                font=("Consolas", 10)).pack(side="left")
+        seed_var = tk.StringVar(value="")
+        tk.Entry(sdf, textvariable=seed_var, font=("Consolas", 10), bg=app.BG,
+                fg=app.TEXT, insertbackground=app.TEXT, width=10).pack(side="left", padx=5)
+        
         tk.Label(rf, text="Draw Tools:", fg=app.TEXT, bg=app.PANEL,
                 font=("Consolas", 10, "bold")).pack(anchor="w", padx=10, pady=(10,5))
         
@@ -513,7 +667,7 @@ class BDCEEditor:
         # Bind events
         cnv.bind("<Button-1>", paint_solid)
         cnv.bind("<B1-Motion>", paint_solid)
-        cnv.bind("<Button-3>", paint_spray)
+        cnv.bind("<Button-3>", start_spray)
         cnv.bind("<B3-Motion>", paint_spray)
         
         tk.Frame(rf, bg="#444444", height=2).pack(fill="x", padx=20, pady=15)
@@ -540,6 +694,7 @@ class BDCEEditor:
                         bg="#dc3545", fg=app.BTN_TXT, font=("Consolas", 10, "bold"),
                         relief="flat", width=25)
         clsb.pack(pady=10, padx=10)
+        bw.protocol("WM_DELETE_WINDOW", close)
         
         tk.Label(rf, text="\n💡 Black = broken areas",
                 font=("Consolas", 8), fg="#888", bg=app.PANEL).pack(side="bottom", pady=10)
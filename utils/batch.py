@@ -0,0 +1,123 @@
+# utils/batch.py - Headless batch skin builder (no tkinter)
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from PIL import Image
+from utils.image_ops import (apply_circle_crop, make_circular, add_ring,
+                             render_damage_set, resize_to_64)
+from utils.export import encode_png
+
+# Output file prefixes for every tier, per unit type
+TIER_PREFIXES = {
+    "infantry": {"full": "if_", "medium": "if2_", "low": "if3_"},
+    "tank": {"full": "tank1_", "medium": "tank2_", "low": "tank3_"},
+}
+
+def load_manifest(path):
+    """Load a batch manifest and expand it into one job per skin unit"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    # A bare list of skins is allowed too
+    if isinstance(data, list):
+        data = {"skins": data}
+
+    base = os.path.dirname(os.path.abspath(path))
+    out_dir = os.path.join(base, data.get("output_dir", "output"))
+    defaults = data.get("defaults", {})
+
+    jobs = []
+    for skin in data.get("skins", []):
+        for unit in skin.get("units", list(TIER_PREFIXES)):
+            spec = dict(defaults)
+            spec.update({k: v for k, v in skin.items()
+                         if k not in TIER_PREFIXES and k != "units"})
+
+            # Per-unit overrides, e.g. a different source for the tank
+            spec.update(skin.get(unit, {}))
+
+            if "source" not in spec:
+                continue
+            jobs.append(make_job(spec, unit, base, out_dir))
+    return jobs
+
+def make_job(spec, unit, base, out_dir):
+    """Resolve paths in a skin spec into a self-contained job dict"""
+    def resolve(p):
+        return p if os.path.isabs(p) else os.path.join(base, p)
+
+    broken = spec.get("broken", {})
+    return {
+        "name": spec["name"],
+        "unit": unit,
+        "source": resolve(spec["source"]),
+        "crop": spec.get("crop"),
+        "ring": spec.get("ring"),
+        "broken": {tier: resolve(p) for tier, p in broken.items() if p},
+        "output_dir": resolve(spec.get("output_dir", out_dir)),
+    }
+
+@lru_cache(maxsize=32)
+def load_reference(path):
+    """Load a broken reference once per worker, so its resized mask is reused"""
+    return Image.open(path).convert("RGBA")
+
+def render_full(job):
+    """Render the full health orb for a job"""
+    img = Image.open(job["source"]).convert("RGBA")
+
+    crop = job.get("crop")
+    if crop:
+        cx, cy, r = crop["center_x"], crop["center_y"], crop["radius"]
+        img = apply_circle_crop(img, cx, cy, r)
+        img = make_circular(img, cx, cy, r)
+    else:
+        img = make_circular(img)
+
+    ring = job.get("ring")
+    if ring and ring.get("thickness", 0) > 0:
+        img = add_ring(img, ring.get("color", (0, 0, 0)), ring["thickness"])
+    return img
+
+def build_job(job):
+    """Render and save every tier of one skin unit, returns written paths"""
+    full = render_full(job)
+    refs = {tier: load_reference(p) for tier, p in job["broken"].items()
+            if tier in ("medium", "low")}
+
+    os.makedirs(job["output_dir"], exist_ok=True)
+    prefixes = TIER_PREFIXES[job["unit"]]
+    written = []
+
+    def write(tier, data):
+        path = os.path.join(job["output_dir"], f"{prefixes[tier]}{job['name']}.png")
+        with open(path, 'wb') as f:
+            f.write(data)
+        written.append(path)
+
+    write("full", encode_png(resize_to_64(full)))
+
+    # Both damaged tiers come out of one pass over the full orb
+    for tier, (_, data) in render_damage_set(full, refs).items():
+        write(tier, data)
+    return written
+
+def build_all(jobs, workers=None):
+    """Build all jobs across a process pool, yields (job, paths, error)"""
+    if workers == 1:
+        for job in jobs:
+            try:
+                yield job, build_job(job), None
+            except Exception as e:
+                yield job, [], e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(job, pool.submit(build_job, job)) for job in jobs]
+        for job, fut in futures:
+            try:
+                yield job, fut.result(), None
+            except Exception as e:
+                yield job, [], e
@@ -0,0 +1,138 @@
+# utils/cache.py - Image revision tracking and small LRU caches
+
+import itertools
+import math
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+# Every image gets a process-unique token; editing it in place must bump it
+_tokens = itertools.count(1)
+
+def image_token(img):
+    """Return the revision token of an image, assigning one on first use"""
+    tok = getattr(img, "_wod_token", None)
+    if tok is None:
+        tok = next(_tokens)
+        img._wod_token = tok
+    return tok
+
+def mark_changed(img):
+    """Give an image a new revision token after it was edited in place"""
+    img._wod_token = next(_tokens)
+    return img._wod_token
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Background jobs share these caches with the Tk thread
+        self.lock = threading.RLock()
+
+    def get(self, key, default=None):
+        """Look up a key, counting the hit or miss"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store a value, evicting the oldest entries past the limit"""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove and return an entry"""
+        with self.lock:
+            return self.entries.pop(key, default)
+
+    def get_or_create(self, key, factory):
+        """Return the cached value or build and store it"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            # Built outside the lock; a concurrent miss just builds twice
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Return a dict of cache statistics"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class PreviewCache(LRUCache):
+    """Canvas-sized thumbnails keyed by image revision and canvas size"""
+
+    def __init__(self, max_entries=8):
+        super().__init__(max_entries)
+
+    def thumbnail(self, img, size):
+        """Return a thumbnail of img that fits size, resampling only on a miss"""
+        key = (image_token(img), size)
+
+        def build():
+            preview = img.copy()
+            preview.thumbnail(size, Image.Resampling.LANCZOS)
+            return preview
+
+        return self.get_or_create(key, build)
+
+    def patch(self, img, box, size):
+        """Re-resample box of an in-place edited image into its thumbnail, or None on a miss"""
+        preview = self.pop((image_token(img), size))
+        token = mark_changed(img)
+        if preview is None:
+            return None
+
+        w, h = img.size
+        pw, ph = preview.size
+        sx, sy = pw / w, ph / h
+
+        # Grow by a pixel so the filter edges blend into the old preview
+        px0 = max(0, int(box[0] * sx) - 1)
+        py0 = max(0, int(box[1] * sy) - 1)
+        px1 = min(pw, int(math.ceil(box[2] * sx)) + 1)
+        py1 = min(ph, int(math.ceil(box[3] * sy)) + 1)
+
+        if px1 > px0 and py1 > py0:
+            # Crop first (with room for the LANCZOS support) so the RGBA
+            # premultiply inside resize only touches the edited region
+            m = int(math.ceil(3 / min(sx, sy))) + 1
+            sx0 = max(0, int(px0 / sx) - m)
+            sy0 = max(0, int(py0 / sy) - m)
+            sx1 = min(w, int(math.ceil(px1 / sx)) + m)
+            sy1 = min(h, int(math.ceil(py1 / sy)) + m)
+            src = img.crop((sx0, sy0, sx1, sy1))
+            region = src.resize((px1 - px0, py1 - py0), Image.Resampling.LANCZOS,
+                                box=(px0 / sx - sx0, py0 / sy - sy0,
+                                     px1 / sx - sx0, py1 / sy - sy0))
+            preview.paste(region, (px0, py0))
+
+        self.put((token, size), preview)
+        return preview, (px0, py0, px1, py1)
@@ -0,0 +1,154 @@
+# utils/history.py - Memory-bounded undo/redo built from compressed tile deltas
+
+import zlib
+from PIL import Image
+from utils.cache import mark_changed
+
+TILE = 64
+
+# zlib level 1: raw pixel tiles compress well and the edit path stays fast
+COMPRESS_LEVEL = 1
+
+def _tile_boxes(size, boxes=None):
+    """Tile boxes covering the image, or only those touching boxes"""
+    w, h = size
+    if boxes is None:
+        boxes = [(0, 0, w, h)]
+    seen = set()
+    for x0, y0, x1, y1 in boxes:
+        for ty in range(max(0, y0) // TILE, (min(h, y1) + TILE - 1) // TILE):
+            for tx in range(max(0, x0) // TILE, (min(w, x1) + TILE - 1) // TILE):
+                if (tx, ty) not in seen:
+                    seen.add((tx, ty))
+                    yield (tx * TILE, ty * TILE, min(w, (tx + 1) * TILE), min(h, (ty + 1) * TILE))
+
+
+class TileSnapshot:
+    """Copy-on-write before state; capture(boxes) must run before those tiles are edited"""
+
+    def __init__(self, img):
+        self.img = img
+        self.mode = img.mode
+        self.size = img.size
+        self.tiles = {}
+
+    def capture(self, boxes):
+        for box in _tile_boxes(self.size, boxes):
+            if box not in self.tiles:
+                self.tiles[box] = self.img.crop(box)
+
+    def crop(self, box):
+        tile = self.tiles.get(box)
+        return tile if tile is not None else self.img.crop(box)
+
+
+class HistoryEntry:
+    """One undoable edit of an image attribute on the app (and its op graph nodes)"""
+
+    def __init__(self, attr, before, after, boxes=None, ops=None):
+        self.attr = attr
+        self.mode = before.mode
+        self.tiles = []
+        self.full = None
+        self.ops = ops
+
+        if before.size != after.size or before.mode != after.mode:
+            # Size changed (e.g. ring maker), keep both images whole
+            self.full = (self._pack(before), self._pack(after))
+            self.nbytes = len(self.full[0][2]) + len(self.full[1][2])
+            return
+
+        self.size = before.size
+        for box in _tile_boxes(before.size, boxes):
+            a = before.crop(box).tobytes()
+            b = after.crop(box).tobytes()
+            if a != b:
+                self.tiles.append((box, zlib.compress(a, COMPRESS_LEVEL),
+                                   zlib.compress(b, COMPRESS_LEVEL)))
+        self.nbytes = sum(len(t[1]) + len(t[2]) for t in self.tiles)
+
+    @staticmethod
+    def _pack(img):
+        return (img.mode, img.size, zlib.compress(img.tobytes(), COMPRESS_LEVEL))
+
+    @staticmethod
+    def _unpack(packed):
+        mode, size, data = packed
+        return Image.frombytes(mode, size, zlib.decompress(data))
+
+    def is_empty(self):
+        ops_changed = self.ops is not None and self.ops[0] != self.ops[1]
+        return self.full is None and not self.tiles and not ops_changed
+
+    def apply(self, app, undo):
+        """Restore the before (undo) or after (redo) state, returns success"""
+        if self.full:
+            setattr(app, self.attr, self._unpack(self.full[0 if undo else 1]))
+        else:
+            img = getattr(app, self.attr)
+            if img is None or img.size != self.size or img.mode != self.mode:
+                return False
+            for box, before, after in self.tiles:
+                size = (box[2] - box[0], box[3] - box[1])
+                tile = Image.frombytes(self.mode, size, zlib.decompress(before if undo else after))
+                img.paste(tile, box[:2])
+            mark_changed(img)
+
+        if self.ops is not None:
+            app.graph.set_nodes(self.ops[0 if undo else 1])
+        return True
+
+
+class EditHistory:
+    """Undo/redo stacks capped by entry count and compressed byte budget"""
+
+    def __init__(self, max_entries=200, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def record(self, attr, before, after, boxes=None, ops=None):
+        """Record an edit of app.<attr>, compared only within boxes if given"""
+        if before is None or after is None:
+            return
+        entry = HistoryEntry(attr, before, after, boxes, ops)
+        if entry.is_empty():
+            return
+        self.undo_stack.append(entry)
+        self.redo_stack = []
+        self.trim()
+
+    def trim(self):
+        """Drop the oldest undo, then redo, entries past the count or byte limits"""
+        while (len(self.undo_stack) + len(self.redo_stack) > self.max_entries or
+               self.total_bytes() > self.max_bytes):
+            if self.undo_stack:
+                self.undo_stack.pop(0)
+            elif self.redo_stack:
+                self.redo_stack.pop(0)
+            else:
+                break
+
+    def total_bytes(self):
+        return sum(e.nbytes for e in self.undo_stack + self.redo_stack)
+
+    def undo(self, app):
+        """Undo the last edit, returns the attribute name it changed or None"""
+        return self._step(app, self.undo_stack, self.redo_stack, True)
+
+    def redo(self, app):
+        """Redo the last undone edit, returns the attribute name or None"""
+        return self._step(app, self.redo_stack, self.undo_stack, False)
+
+    def _step(self, app, source, target, undo):
+        while source:
+            entry = source.pop()
+            if entry.apply(app, undo):
+                target.append(entry)
+                return entry.attr
+        return None
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
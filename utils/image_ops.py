@@ -1,25 +1,80 @@
 # utils/image_ops.py - Image processing utilities
 
-from PIL import Image, ImageDraw, ImageOps
+from functools import lru_cache
+from PIL import Image, ImageChops
+from utils.cache import LRUCache, image_token
+from utils.export import encode_png, progressive_resize
+from utils.masks import circle_mask, ring_mask
+
+# Resized broken-reference alpha masks, keyed by reference revision and size
+_broken_masks = LRUCache(max_entries=8)
+
+def broken_mask(broken_ref, size):
+    """Alpha channel of a broken reference resampled to size (cached, do not modify)"""
+    key = (image_token(broken_ref), tuple(size))
+    return _broken_masks.get_or_create(
+        key, lambda: broken_ref.getchannel("A").resize(size, Image.Resampling.LANCZOS))
+
+# Full resolution originals, reopened lazily for export
+_originals = LRUCache(max_entries=1)
+
+def load_image(path, max_size=None):
+    """Open an image as RGBA at a working resolution of at most max_size"""
+    # JPEGs decode at reduced scale; load_original() keeps the full one
+    img = Image.open(path)
+    if max_size:
+        scale = max_size / max(img.size)
+        if scale < 1:
+            img.draft(None, (int(img.width * scale) + 1, int(img.height * scale) + 1))
+        if img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA")
+        factor = max(img.size) // max_size
+        if factor > 1:
+            img = img.reduce(factor)
+    img = img.convert("RGBA")
+    if max_size and max(img.size) > max_size:
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    
+    img._wod_source = path
+    img._wod_loaded_token = image_token(img)
+    return img
+
+def load_original(img):
+    """Full resolution original an image was loaded from, or the image itself"""
+    path = getattr(img, "_wod_source", None)
+    if not path:
+        return img
+    return _originals.get_or_create(path, lambda: Image.open(path).convert("RGBA"))
+
+def snapshot(img):
+    """Private copy of img that load_original still finds the original of while unedited"""
+    copy = img.copy()
+    if getattr(img, "_wod_loaded_token", None) == image_token(img):
+        copy._wod_source = img._wod_source
+        copy._wod_loaded_token = image_token(copy)
+    return copy
 
 def apply_broken_effect(full_image, broken_ref):
-    """Apply broken dot mask to full health image"""
-    br_resized = broken_ref.resize(full_image.size, Image.Resampling.LANCZOS)
-    mask = br_resized.split()[3]  # alpha channel
-    result = full_image.copy()
-    result.putalpha(mask)
+    """Apply broken dot mask to full health image (multiplied into its alpha)"""
+    mask = broken_mask(broken_ref, full_image.size)
+    result = full_image.convert("RGBA")
+    result.putalpha(ImageChops.multiply(result.getchannel("A"), mask))
     return result
 
+def render_damage_set(full_image, broken_refs, size=(64, 64), compress_level=6):
+    """Render every damaged tier of one orb, returns {tier: (64x64 image, png_bytes)}"""
+    r, g, b, orb_alpha = full_image.convert("RGBA").split()
+    tiers = {}
+    for name, ref in broken_refs.items():
+        alpha = ImageChops.multiply(orb_alpha, broken_mask(ref, full_image.size))
+        tier = progressive_resize(Image.merge("RGBA", (r, g, b, alpha)), size)
+        tiers[name] = (tier, encode_png(tier, compress_level))
+    return tiers
+
+@lru_cache(maxsize=4)
 def create_circle_mask(width, height, center_x, center_y, radius):
-    """Create a circular mask"""
-    mask = Image.new("L", (width, height), 0)
-    draw = ImageDraw.Draw(mask)
-    x1 = center_x - radius
-    y1 = center_y - radius
-    x2 = center_x + radius
-    y2 = center_y + radius
-    draw.ellipse((x1, y1, x2, y2), fill=255)
-    return mask
+    """Return a cached anti-aliased circular mask (do not modify it)"""
+    return circle_mask(width, height, center_x, center_y, radius)
 
 def apply_circle_crop(image, center_x, center_y, radius):
     """Crop image to circle"""
@@ -43,4 +98,43 @@ def rotate_image(image, degrees):
 
 def resize_to_64(image):
     """Resize image to 64x64"""
-    return image.resize((64, 64), Image.Resampling.LANCZOS)
+    return progressive_resize(image, (64, 64))
+
+def make_circular(image, center_x=None, center_y=None, radius=None):
+    """Cut a square circular base out of image, using crop info if given"""
+    if radius and center_x is not None:
+        sz = int(radius * 2)
+        circular = Image.new("RGBA", (sz, sz), (0, 0, 0, 0))
+        px = int(radius - center_x)
+        py = int(radius - center_y)
+        circular.paste(image, (px, py), image)
+        return circular
+    
+    # Fallback: largest centered circle
+    w, h = image.size
+    sz = min(w, h)
+    left = (w - sz) // 2
+    top = (h - sz) // 2
+    cropped = image.crop((left, top, left + sz, top + sz))
+    
+    mask = create_circle_mask(sz, sz, (sz - 1) / 2, (sz - 1) / 2, (sz - 1) / 2)
+    circular = Image.new("RGBA", (sz, sz))
+    circular.paste(cropped, (0, 0), mask)
+    return circular
+
+@lru_cache(maxsize=8)
+def ring_alpha(size, thickness):
+    """Return a cached ring mask, shared by every color (do not modify it)"""
+    return ring_mask(size, thickness)
+
+@lru_cache(maxsize=16)
+def ring_layer(size, color, thickness):
+    """Return a cached transparent layer with just the ring (do not modify it)"""
+    ring = Image.new("RGBA", (size, size), tuple(color[:3]) + (255,))
+    ring.putalpha(ring_alpha(size, thickness))
+    return ring
+
+def add_ring(image, color, thickness):
+    """Draw a ring of given color and thickness around the edge of a square image"""
+    ring = ring_layer(image.size[0], tuple(color), int(thickness))
+    return Image.alpha_composite(image, ring)
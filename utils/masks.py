@@ -0,0 +1,87 @@
+# utils/masks.py - Anti-aliased circle and ring masks
+
+import math
+from PIL import Image, ImageDraw
+
+# The hard fill stops a pixel short of each edge and ImageDraw may round it
+# in by another; pixels this far inside an edge are always computed
+MARGIN = 2
+
+def _spans(cx, dy2, near, far, left, right):
+    """Pixel runs of one row lying between near and far from the centre"""
+    if dy2 >= far * far:
+        return ()
+    xf = math.sqrt(far * far - dy2)
+    lo = max(left, math.floor(cx - xf))
+    hi = min(right, math.ceil(cx + xf))
+    if near <= 0 or dy2 >= near * near:
+        return ((lo, hi + 1),)
+    xn = math.sqrt(near * near - dy2)
+    return ((lo, min(hi + 1, math.ceil(cx - xn))), (max(lo, math.floor(cx + xn) + 1), hi + 1))
+
+def disc(width, height, cx, cy, radius, hole=None):
+    """Anti-aliased L mask of a circle (or a ring, with hole) around pixel centre (cx, cy)"""
+    # Only the bands along the edges are computed per pixel; ImageDraw fills the rest
+    mask = Image.new("L", (width, height), 0)
+    draw = ImageDraw.Draw(mask)
+    edges = [radius]
+    # Hard fill and clear a pixel short of each edge; the bands cover the rest
+    if radius > 1:
+        draw.ellipse((cx - radius + 1, cy - radius + 1, cx + radius - 1, cy + radius - 1), fill=255)
+    if hole is not None:
+        hole = min(hole, radius)
+        edges.append(hole)
+        if hole > 1:
+            draw.ellipse((cx - hole + 1, cy - hole + 1, cx + hole - 1, cy + hole - 1), fill=0)
+
+    # A centre on a whole or half pixel lets the lower right quadrant be
+    # mirrored onto the other three, and when cx and cy share that fraction
+    # its lower half is swapped across the diagonal too; draw.point drops
+    # what falls outside the mask
+    outer = radius + 1
+    mirror = float(2 * cx).is_integer() and float(2 * cy).is_integer()
+    swap = mirror and float(cx - cy).is_integer()
+    if swap:
+        left, top, right, bottom = math.ceil(cx), math.ceil(cy), math.inf, math.floor(cy + outer / math.sqrt(2)) + 1
+    elif mirror:
+        left, top, right, bottom = math.ceil(cx), math.ceil(cy), math.inf, math.inf
+    else:
+        left, top, right, bottom = 0, 0, width - 1, height - 1
+
+    cut = hole + 1 if hole is not None else 0.0
+    levels = [[] for _ in range(256)]
+    sqrt = math.sqrt
+    for j in range(max(top, math.ceil(cy - outer)), min(bottom, math.floor(cy + outer)) + 1):
+        dy2 = (j - cy) ** 2
+        row_left = max(left, math.ceil(cx + j - cy)) if swap else left
+        for edge in edges:
+            for start, stop in _spans(cx, dy2, edge - MARGIN, edge + 1, row_left, right):
+                for i in range(start, stop):
+                    d = sqrt((i - cx) ** 2 + dy2)
+                    cover = outer - d
+                    cover = 1.0 if cover > 1 else cover if cover > 0 else 0.0
+                    inside = cut - d
+                    if inside > 0:
+                        cover -= 1.0 if inside > 1 else inside
+                    levels[int(cover * 255 + 0.5)].append((i, j))
+
+    mx, my, shift = round(2 * cx), round(2 * cy), round(cx - cy)
+    for value, points in enumerate(levels):
+        if not points:
+            continue
+        if swap:
+            points += [(y + shift, x - shift) for x, y in points]
+        if mirror:
+            points += [(mx - x, y) for x, y in points]
+            points += [(x, my - y) for x, y in points]
+        draw.point(points, fill=value)
+    return mask
+
+def circle_mask(width, height, center_x, center_y, radius):
+    """Anti-aliased filled circle mask"""
+    return disc(width, height, center_x, center_y, radius)
+
+def ring_mask(size, thickness):
+    """Anti-aliased ring of the given thickness along the edge of a size x size square"""
+    c = (size - 1) / 2
+    return disc(size, size, c, c, c, c - thickness)
@@ -0,0 +1,49 @@
+# utils/mipmap.py - Cached mip pyramids for zoomed previews
+
+from PIL import Image
+from utils.cache import LRUCache, image_token
+
+# Halving stops once a level's short side would drop below this
+MIN_LEVEL = 32
+
+# Pyramids hold about 1.33x the premultiplied image, so only a few are kept
+_pyramids = LRUCache(max_entries=4)
+
+def pyramid(img):
+    """Premultiplied (RGBa) copies of img, each half the size of the last"""
+    def build():
+        levels = [img.convert("RGBa")]
+        while min(levels[-1].size) // 2 >= MIN_LEVEL:
+            levels.append(levels[-1].reduce(2))
+        return levels
+
+    return _pyramids.get_or_create(image_token(img), build)
+
+def zoomed(img, scale, viewport):
+    """img scaled by scale, cropped to the centred part that fits viewport (w, h)"""
+    w, h = img.size
+    out_w = max(1, round(w * scale))
+    out_h = max(1, round(h * scale))
+
+    # Visible part in source pixels, clamped so rounding never leaves the image
+    sw, sh = min(w, viewport[0] / scale), min(h, viewport[1] / scale)
+    x0, y0 = max(0.0, (w - sw) / 2), max(0.0, (h - sh) / 2)
+    box = (x0, y0, min(float(w), x0 + sw), min(float(h), y0 + sh))
+    vw = max(1, min(viewport[0], out_w, round((box[2] - box[0]) * scale)))
+    vh = max(1, min(viewport[1], out_h, round((box[3] - box[1]) * scale)))
+
+    if scale >= 1:
+        src = img if img.mode == "RGBA" else img.convert("RGBA")
+        return src.resize((vw, vh), Image.Resampling.NEAREST, box=box)
+
+    levels = pyramid(img)
+    level = levels[0]
+    for lvl in levels[1:]:
+        if lvl.width < out_w or lvl.height < out_h:
+            break
+        level = lvl
+
+    fx, fy = level.width / w, level.height / h
+    lbox = (box[0] * fx, box[1] * fy,
+            min(float(level.width), box[2] * fx), min(float(level.height), box[3] * fy))
+    return level.resize((vw, vh), Image.Resampling.BILINEAR, box=lbox).convert("RGBA")
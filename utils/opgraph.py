@@ -0,0 +1,212 @@
+# utils/opgraph.py - Non-destructive edit chain with lazy, memoized rendering
+
+from abc import ABC, abstractmethod
+from utils.cache import LRUCache, image_token
+from utils.export import progressive_resize
+from utils.image_ops import (apply_circle_crop, make_circular, add_ring, flip_image, rotate_image,
+                             load_original, snapshot)
+
+def _pixels(values, width):
+    # Rounded so a value normalized and scaled back is exact again (make_circular truncates)
+    return tuple(round(v * width, 6) for v in values)
+
+
+class OpNode(ABC):
+    """One recorded edit, with lengths stored as fractions of the input width"""
+
+    @abstractmethod
+    def apply(self, img):
+        """Return a new image with this edit applied to img"""
+
+    def follow(self, old, new):
+        """This node after an upstream node old was replaced by new"""
+        return self
+
+
+class CropNode(OpNode):
+    """Circle crop (apply_circle_crop)"""
+
+    def __init__(self, center_x, center_y, radius):
+        self.circle = (center_x, center_y, radius)
+
+    @classmethod
+    def from_pixels(cls, width, center_x, center_y, radius):
+        return cls(center_x / width, center_y / width, radius / width)
+
+    def pixels(self, width):
+        """(center_x, center_y, radius) in pixels of an input width wide"""
+        return _pixels(self.circle, width)
+
+    def apply(self, img):
+        return apply_circle_crop(img, *self.pixels(img.width))
+
+
+class RingNode(OpNode):
+    """Circular cut-out with a ring around the edge (circle None is the largest centered one)"""
+
+    def __init__(self, circle, color, thickness):
+        self.circle = circle
+        self.color = tuple(color)
+        self.thickness = thickness
+
+    @classmethod
+    def from_pixels(cls, width, center_x, center_y, radius, color, thickness):
+        circle = None
+        if radius and center_x is not None:
+            circle = (center_x / width, center_y / width, radius / width)
+        return cls(circle, color, thickness / width)
+
+    def pixels(self, width):
+        """(center_x, center_y, radius) in pixels of an input width wide"""
+        return _pixels(self.circle, width)
+
+    def apply(self, img):
+        w = img.width
+        if self.circle:
+            base = make_circular(img, *self.pixels(w))
+        else:
+            base = make_circular(img)
+        return add_ring(base, self.color, max(1, round(self.thickness * w)))
+
+    def follow(self, old, new):
+        # A ring fitted to a crop circle moves with it
+        if isinstance(old, CropNode) and isinstance(new, CropNode) and self.circle == old.circle:
+            return RingNode(new.circle, self.color, self.thickness)
+        return self
+
+
+class FlipNode(OpNode):
+    def __init__(self, direction):
+        self.direction = direction
+
+    def apply(self, img):
+        return flip_image(img, self.direction)
+
+
+class RotateNode(OpNode):
+    def __init__(self, degrees):
+        self.degrees = degrees
+
+    def apply(self, img):
+        return rotate_image(img, self.degrees)
+
+
+class StrokeNode(OpNode):
+    """One brush or eraser stroke (the stamp points it was painted with)"""
+
+    def __init__(self, tool, points, radius, color=(0, 0, 0, 255), hardness=1.0):
+        self.tool = tool
+        self.points = tuple(points)
+        self.radius = radius
+        self.color = tuple(color)
+        self.hardness = hardness
+
+    @classmethod
+    def from_pixels(cls, width, tool, points, radius, color=(0, 0, 0, 255), hardness=1.0):
+        return cls(tool, [(x / width, y / width) for x, y in points], radius / width,
+                   color, hardness)
+
+    def apply(self, img):
+        # The stroke engine (and ImageDraw) loads with the drawing tools, not at startup
+        from utils.stroke import paint, erase
+        w = img.width
+        out = img.copy()
+        points = [(x * w, y * w) for x, y in self.points]
+        radius = max(1, round(self.radius * w))
+        if self.tool == "eraser":
+            erase(out, points, radius, self.hardness)
+        else:
+            paint(out, points, radius, self.color, self.hardness)
+        return out
+
+
+class OpGraph:
+    """Source image plus the chain of edits applied to it, rendered lazily"""
+
+    def __init__(self, max_entries=8):
+        self.source = None
+        self.nodes = []
+        self.memo = LRUCache(max_entries=max_entries)
+
+    def reset(self, source):
+        """Start a new chain from source (copied; the app edits its image in place)"""
+        self.source = snapshot(source) if source is not None else None
+        self.nodes = []
+        self.memo.clear()
+
+    def snapshot(self):
+        return tuple(self.nodes)
+
+    def find(self, kind):
+        """Index of the last node of a class, or None"""
+        for i in range(len(self.nodes) - 1, -1, -1):
+            if isinstance(self.nodes[i], kind):
+                return i
+        return None
+
+    def replaced(self, index, node):
+        """Node list with nodes[index] replaced and downstream nodes following it"""
+        old = self.nodes[index]
+        tail = [n.follow(old, node) for n in self.nodes[index + 1:]]
+        return self.nodes[:index] + [node] + tail
+
+    def set_nodes(self, nodes, result=None):
+        """Adopt a node list; result, if given, is its render at source resolution"""
+        self.nodes = list(nodes)
+        if result is not None and self.source is not None:
+            self._keep((image_token(self.source), self.source.width, tuple(self.nodes)), result)
+
+    def _keep(self, key, img):
+        self.memo.put(key, (img, image_token(img)))
+
+    def _memoized(self, key):
+        """Image memoized under key, or None if missing or edited since"""
+        entry = self.memo.get(key)
+        if entry is None or image_token(entry[0]) != entry[1]:
+            return None
+        return entry[0]
+
+    def _base(self, width):
+        src = self.source
+        if width == src.width:
+            return src
+        # Wider than the working copy: resample the full resolution original
+        if width > src.width:
+            src = load_original(src)
+            if width == src.width:
+                return src
+        return progressive_resize(src, (width, max(1, round(src.height * width / src.width))))
+
+    def exporter(self):
+        """Return a job that renders the current chain from load_original() off the Tk thread"""
+        source, nodes = self.source, tuple(self.nodes)
+
+        def render():
+            img = load_original(source)
+            for node in nodes:
+                img = node.apply(img)
+            # Without nodes that is the cached original itself
+            return img if nodes else img.copy()
+        return render
+
+    def render(self, width=None, nodes=None, upto=None):
+        """Render the chain (or nodes, or the first upto) at a source width as a new image"""
+        nodes = list(self.nodes if nodes is None else nodes)[:upto]
+        width = width or self.source.width
+        tok = image_token(self.source)
+
+        # Resume from the longest prefix already rendered at this width
+        start, img = 0, None
+        for i in range(len(nodes), -1, -1):
+            img = self._memoized((tok, width, tuple(nodes[:i])))
+            if img is not None:
+                start = i
+                break
+        if img is None:
+            img = self._base(width)
+            self._keep((tok, width, ()), img)
+
+        for i in range(start, len(nodes)):
+            img = nodes[i].apply(img)
+            self._keep((tok, width, tuple(nodes[:i + 1])), img)
+        return img.copy()
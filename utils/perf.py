@@ -0,0 +1,127 @@
+# utils/perf.py - Operation latency samples and preview frame rate for Dev Mode
+
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per operation; older ones are dropped
+WINDOW = 500
+
+# Preview frame rate is counted over the last this many seconds
+FPS_WINDOW = 1.0
+
+PERCENTILES = (50, 90, 99)
+
+
+class PerfMonitor:
+    """Rolling latency samples per operation name and preview frame times"""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.samples = {}
+        self.frames = deque(maxlen=window)
+        self.batching = 0
+        self.frame_pending = False
+        # Background jobs record timings too
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds):
+        """Add one duration sample for an operation"""
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    @contextmanager
+    def measure(self, name):
+        """Time the enclosed block as one sample of name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def frame(self):
+        """Note that a new preview frame reached the canvas"""
+        if self.batching:
+            self.frame_pending = True
+        else:
+            self.frames.append(time.perf_counter())
+
+    @contextmanager
+    def one_frame(self):
+        """Count every preview update in the enclosed block as a single frame"""
+        self.batching += 1
+        try:
+            yield
+        finally:
+            self.batching -= 1
+            if not self.batching and self.frame_pending:
+                self.frame_pending = False
+                self.frames.append(time.perf_counter())
+
+    def fps(self):
+        """Preview frames shown per second over the last FPS_WINDOW seconds"""
+        cutoff = time.perf_counter() - FPS_WINDOW
+        return sum(1 for t in list(self.frames) if t >= cutoff) / FPS_WINDOW
+
+    def report(self):
+        """Return {name: {"count", "p50", "p90", "p99", "max"}} in milliseconds"""
+        with self.lock:
+            snapshot = {name: sorted(s) for name, s in self.samples.items()}
+        out = {}
+        for name, values in sorted(snapshot.items()):
+            n = len(values)
+            row = {"count": n, "max": values[-1] * 1000}
+            for p in PERCENTILES:
+                # Nearest-rank percentile
+                row[f"p{p}"] = values[min(n - 1, max(0, -(-p * n // 100) - 1))] * 1000
+            out[name] = row
+        return out
+
+    def reset(self):
+        """Drop all samples"""
+        with self.lock:
+            self.samples.clear()
+            self.frames.clear()
+
+
+# Shared by the tools, preview updates and the Dev Mode panel
+monitor = PerfMonitor()
+
+def timed(name):
+    """Decorator that records every call's duration under name"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                monitor.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def image_bytes(img):
+    """Pixel memory an image holds in Pillow (0 for None)"""
+    if img is None:
+        return 0
+    # Pillow stores 1-byte modes packed, 16-bit modes in 2 bytes, the rest in 4
+    if img.mode in ("1", "L", "P"):
+        size = 1
+    elif img.mode.startswith("I;16"):
+        size = 2
+    else:
+        size = 4
+    return img.width * img.height * size
+
+def format_bytes(n):
+    """Human readable byte count"""
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
@@ -0,0 +1,92 @@
+# utils/project.py - .wodskin project files with memory-mapped image layers
+
+import json
+import mmap
+import struct
+from PIL import Image
+from utils.saving import open_atomic
+
+PROJECT_EXT = ".wodskin"
+MAGIC = b"WODSKIN\0"
+VERSION = 1
+
+# Layer buffers start on 64-byte boundaries so they can be mapped directly
+ALIGN = 64
+
+# Modes Pillow can map straight from a raw buffer; anything else is stored as RGBA
+MAPPABLE_MODES = ("RGBA", "L")
+
+# App attributes saved as image layers
+IMAGE_ATTRS = ("full_health_image", "medium_health_image", "low_health_image",
+               "broken_reference", "low_broken_reference", "broken_effect_image",
+               "damage_mask")
+
+_PREFIX = struct.Struct("<8sI")
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def write_project(path, images, state):
+    """Write images (name -> Image or None) and a JSON state dict to path"""
+    layers = {}
+    order = []
+    offset = 0
+    for name, img in images.items():
+        if img is None:
+            continue
+        if img.mode not in MAPPABLE_MODES:
+            img = img.convert("RGBA")
+        length = img.width * img.height * len(img.mode)
+        layers[name] = {"mode": img.mode, "size": list(img.size),
+                        "offset": offset, "length": length}
+        order.append((img, offset))
+        offset = _aligned(offset + length)
+
+    header = json.dumps({"version": VERSION, "state": state, "layers": layers}).encode()
+    data_start = _aligned(_PREFIX.size + len(header))
+
+    with open_atomic(path) as f:
+        f.write(_PREFIX.pack(MAGIC, len(header)))
+        f.write(header)
+        for img, off in order:
+            f.seek(data_start + off)
+            f.write(img.tobytes())
+    return path
+
+def materialize(img):
+    """In-memory copy of an image mapped from a project file, other images as-is"""
+    if img is not None and img.readonly:
+        return img.copy()
+    return img
+
+
+class Project:
+    """An opened project; layers are read-only images mapped from the file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError("Not a WOD Skin Maker project")
+            header = json.loads(f.read(length))
+            if header.get("version", 0) > VERSION:
+                raise ValueError("Project was saved by a newer version")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data_start = _aligned(_PREFIX.size + length)
+        self.layers = header["layers"]
+        self.state = header["state"]
+
+    def image(self, name):
+        """Map one layer as an image, or None if the project has no such layer"""
+        info = self.layers.get(name)
+        if info is None:
+            return None
+        start = self.data_start + info["offset"]
+        buf = memoryview(self.map)[start:start + info["length"]]
+        mode = info["mode"]
+        return Image.frombuffer(mode, tuple(info["size"]), buf, "raw", mode, 0, 1)
+
+    def close(self):
+        """Release the mapping; raises BufferError while a mapped image still uses it"""
+        self.map.close()
@@ -0,0 +1,65 @@
+# utils/saving.py - Atomic file writes with background backup copies
+
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Read once: os.umask() can only be read by setting it, which races other threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def _file_mode(path):
+    """Permissions for a new version of path: the old file's, else what open() would give"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+@contextmanager
+def open_atomic(path):
+    """Open a temp file next to path for writing; it replaces path on success"""
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".wodskin-", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, _file_mode(path))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def write_atomic(path, data):
+    """Write bytes to path through a temp file and rename"""
+    with open_atomic(path) as f:
+        f.write(data)
+
+
+class SaveService:
+    """Writes encoded files atomically; .backup copies are written in the background"""
+
+    def __init__(self):
+        self.backups = ThreadPoolExecutor(max_workers=1)
+        # save() runs on job workers, flush() on the Tk thread
+        self.lock = threading.Lock()
+        self.pending = []
+
+    def save(self, path, data, backup=False):
+        """Write data to path, and queue path + '.backup' from the same bytes"""
+        write_atomic(path, data)
+        if backup:
+            with self.lock:
+                self.pending = [f for f in self.pending if not f.done()]
+                self.pending.append(self.backups.submit(write_atomic, path + ".backup", data))
+
+    def flush(self, timeout=None):
+        """Wait for queued backups to finish"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        wait(pending, timeout=timeout)
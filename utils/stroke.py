@@ -0,0 +1,178 @@
+# utils/stroke.py - Gap-free stroke engine shared by the draw and erase tools
+
+import math
+import random
+from functools import lru_cache
+from PIL import Image, ImageChops, ImageDraw, ImageOps
+
+# Stamp spacing as a fraction of the brush radius
+DEFAULT_SPACING = 0.25
+
+# Upper bound on stamps per input event, so a huge jump costs bounded work
+MAX_STAMPS = 128
+
+# Stamps are merged into one mask per batch; small batches keep the dirty
+# boxes tight along diagonal strokes
+BATCH_STAMPS = 16
+
+# Spray textures are this many dabs wide, so consecutive dabs rarely repeat a window
+SPRAY_TILE = 4
+
+# radial_gradient() reaches this value at the edge of its inscribed circle
+_GRADIENT_EDGE = 128 * 255 / (128 * math.sqrt(2))
+
+@lru_cache(maxsize=64)
+def brush_mask(radius, hardness=1.0):
+    """Return a cached L-mode brush stamp of size 2*radius+1 (hardness < 1 feathers it)"""
+    d = radius * 2 + 1
+    if hardness >= 1.0:
+        mask = Image.new("L", (d, d), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, d - 1, d - 1), fill=255)
+        return mask
+
+    # Distance from the centre as 0..255, then a falloff lookup table
+    dist = Image.radial_gradient("L").resize((d, d), Image.Resampling.BILINEAR)
+    lut = []
+    for v in range(256):
+        f = v / _GRADIENT_EDGE
+        if f <= hardness:
+            lut.append(255)
+        elif f >= 1.0:
+            lut.append(0)
+        else:
+            lut.append(int(255 * (1.0 - f) / (1.0 - hardness)))
+    return dist.point(lut)
+
+
+class StrokeEngine:
+    """Turns a sequence of input positions into evenly spaced brush stamps"""
+
+    def __init__(self, spacing=DEFAULT_SPACING):
+        self.spacing = spacing
+        self.last = None
+        self.carry = 0.0
+
+    def begin(self, x, y):
+        """Start a stroke, returns the first stamp"""
+        self.last = (x, y)
+        self.carry = 0.0
+        return [(x, y)]
+
+    def move_to(self, x, y, radius):
+        """Return the stamps along the segment from the last position to (x, y)"""
+        if self.last is None:
+            return self.begin(x, y)
+
+        lx, ly = self.last
+        dist = math.hypot(x - lx, y - ly)
+        step = max(1.0, radius * self.spacing)
+
+        # Widen the spacing rather than emit an unbounded number of stamps
+        if dist / step > MAX_STAMPS:
+            step = dist / MAX_STAMPS
+
+        points = []
+        t = step - self.carry
+        while t <= dist:
+            points.append((lx + (x - lx) * t / dist, ly + (y - ly) * t / dist))
+            t += step
+        self.carry = dist - (t - step) if points else self.carry + dist
+        self.last = (x, y)
+        return points
+
+    def end(self):
+        """Finish the current stroke"""
+        self.last = None
+        self.carry = 0.0
+
+
+def stamp_box(points, radius):
+    """Box the brush covers when stamped at points, or None for none"""
+    if not points:
+        return None
+    xs = [int(round(p[0])) for p in points]
+    ys = [int(round(p[1])) for p in points]
+    return min(xs) - radius, min(ys) - radius, max(xs) + radius + 1, max(ys) + radius + 1
+
+def render_stamps(points, radius, hardness=1.0):
+    """Combine stamps into one mask, returns (mask, box) or None"""
+    box = stamp_box(points, radius)
+    if box is None:
+        return None
+
+    brush = brush_mask(radius, hardness)
+    x0, y0, x1, y1 = box
+    mask = Image.new("L", (x1 - x0, y1 - y0), 0)
+    for x, y in points:
+        mask.paste(255, (int(round(x)) - radius - x0, int(round(y)) - radius - y0), brush)
+    return mask, box
+
+def clip_box(box, size):
+    """Clip a box to image bounds"""
+    w, h = size
+    return (max(0, box[0]), max(0, box[1]), min(w, box[2]), min(h, box[3]))
+
+def union_box(boxes):
+    """Smallest box covering all boxes, or None for none"""
+    if not boxes:
+        return None
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+def batches(points):
+    """Split stamp points into batches of BATCH_STAMPS"""
+    for i in range(0, len(points), BATCH_STAMPS):
+        yield points[i:i + BATCH_STAMPS]
+
+def paint(img, points, radius, color, hardness=1.0):
+    """Paint stamps onto img in place, returns the list of dirty boxes"""
+    boxes = []
+    for batch in batches(points):
+        mask, box = render_stamps(batch, radius, hardness)
+        img.paste(tuple(color), box, mask)
+        boxes.append(clip_box(box, img.size))
+    return boxes
+
+def erase(img, points, radius, hardness=1.0):
+    """Erase stamps from img's alpha (or from an L mask) in place, returns the dirty boxes"""
+    boxes = []
+    for batch in batches(points):
+        mask, box = render_stamps(batch, radius, hardness)
+        region = img.crop(box)
+        if img.mode == "L":
+            region = ImageChops.multiply(region, ImageOps.invert(mask))
+        else:
+            region.putalpha(ImageChops.multiply(region.getchannel("A"), ImageOps.invert(mask)))
+        img.paste(region, box)
+        boxes.append(clip_box(box, img.size))
+    return boxes
+
+@lru_cache(maxsize=8)
+def spray_texture(radius, count=None):
+    """Return a cached L tile of spray dots at the density of a dab (do not modify it)"""
+    n = count or max(10, radius)
+    size = (radius * 2 + 7) * SPRAY_TILE
+    dots = round(n * size * size / (radius * 2 + 1) ** 2)
+    rng = random.Random(radius)
+    tex = Image.new("L", (size, size), 0)
+    draw = ImageDraw.Draw(tex)
+    for _ in range(dots):
+        x, y, sz = rng.randrange(size), rng.randrange(size), rng.randint(1, 3)
+        draw.ellipse((x - sz, y - sz, x + sz, y + sz), fill=255)
+    return tex
+
+def spray_mask(radius, rng, count=None):
+    """Rasterize one spray dab into an L mask centred at (radius+3, radius+3)"""
+    tex = spray_texture(radius, count)
+    side = radius * 2 + 7
+    x, y = rng.randrange(tex.width - side + 1), rng.randrange(tex.height - side + 1)
+    return ImageChops.multiply(tex.crop((x, y, x + side, y + side)), brush_mask(radius + 3))
+
+def spray(target, x, y, radius, rng, count=None):
+    """Clear a spray dab out of an L mask in place, returns the dirty box"""
+    dots = spray_mask(radius, rng, count)
+    pad = radius + 3
+    box = (x - pad, y - pad, x + pad + 1, y + pad + 1)
+    region = ImageChops.subtract(target.crop(box), dots)
+    target.paste(region, box)
+    return clip_box(box, target.size)